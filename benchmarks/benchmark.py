@@ -0,0 +1,198 @@
+"""
+Synthetic benchmarks for the ``inline_reference`` extension.
+
+Generates a sphinx project with a configurable number of documents, targets, references, backlinks
+and mutual references, builds it with each of the requested builders, and reports the time spent
+in the read, resolve and write phases of each build as JSON::
+
+    python benchmarks/benchmark.py --docs 500 --refs 200 --output bench.json
+
+The resolve phase is the time spent resolving the references of the documents and running the
+``doctree-resolved`` handlers (including `InlineReferenceDomain.resolve_xref` and
+`process_iref_nodes`), while the write phase is the remaining time spent writing the output,
+including the ``visit_`` and ``depart_`` functions of the nodes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+from unittest import mock
+
+import sphinx
+from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+
+
+def generate_project(srcdir: Path,
+                     docs: int,
+                     targets: int,
+                     refs: int,
+                     backlinks: int,
+                     fan_in: int,
+                     mrefs: int,
+                     seed: int) -> None:
+    """
+    Writes a sphinx project using all the ``:iref:`` roles into `srcdir`.
+
+    Parameters
+    ----------
+    srcdir
+        The directory into which to write the project.
+    docs
+        The number of documents.
+    targets
+        The number of ``:iref:target:`` in each document.
+    refs
+        The number of ``:iref:ref:`` to the targets in each document.
+    backlinks
+        The number of ``:iref:backlink:`` in each document.
+    fan_in
+        The number of ``:iref:ref:`` to each backlink, spread over random documents.
+    mrefs
+        The number of ``:iref:mref:`` pairs starting in each document. The other member of each
+        pair is in the next document.
+    seed
+        The seed of the random placement of the references.
+    """
+    rng = random.Random(seed)
+    names = [f'doc{i:05d}' for i in range(docs)]
+    bodies = [[] for _ in range(docs)]
+
+    for i in range(docs):
+        for j in range(targets):
+            bodies[i].append(f'Target :iref:target:`target {j}<t-{i}-{j}>` in text.')
+        for j in range(refs if targets else 0):
+            k, m = rng.randrange(docs), rng.randrange(targets)
+            bodies[i].append(f'Reference to :iref:ref:`target {m}<t-{k}-{m}>` in text.')
+        for j in range(backlinks):
+            bodies[i].append(f'Backlink :iref:backlink:`backlink {j}<b-{i}-{j}>` in text.')
+            for _ in range(fan_in):
+                bodies[rng.randrange(docs)].append(
+                    f'Reference to :iref:ref:`backlink {j}<b-{i}-{j}>` in text.'
+                )
+        for j in range(mrefs):
+            bodies[i].append(f'Mutual :iref:mref:`link {j}<m-{i}-{j}>` in text.')
+            bodies[(i + 1) % docs].append(f'Mutual :iref:mref:`link {j}<m-{i}-{j}>` in text.')
+
+    srcdir.mkdir(parents=True, exist_ok=True)
+    (srcdir / 'conf.py').write_text("project = 'benchmark'\nextensions = ['inline_reference']\n")
+    toctree = '\n'.join(f'   {name}' for name in names)
+    (srcdir / 'index.rst').write_text(f'Benchmark\n=========\n\n.. toctree::\n\n{toctree}\n')
+
+    for name, body in zip(names, bodies):
+        rng.shuffle(body)
+        paragraphs = '\n\n'.join(' '.join(body[k:k + 10]) for k in range(0, len(body), 10))
+        (srcdir / f'{name}.rst').write_text(f'{name}\n{"=" * len(name)}\n\n{paragraphs}\n')
+
+
+def time_build(srcdir: Path, builder: str, parallel: int) -> dict[str, float]:
+    """
+    Builds the project in `srcdir` from scratch and times its phases.
+
+    Parameters
+    ----------
+    srcdir
+        The directory of the project.
+    builder
+        The name of the sphinx builder to use.
+    parallel
+        The number of parallel processes to use.
+
+    Returns
+    -------
+    timings
+        The time in seconds spent in the 'read', 'resolve' and 'write' phases, and in 'total'.
+    """
+    outdir = srcdir / '_build' / builder
+    app = Sphinx(str(srcdir), str(srcdir), str(outdir), str(outdir / '.doctrees'), builder,
+                 status=None, warning=None, freshenv=True, parallel=parallel)
+
+    marks = {}
+    resolve = 0.0
+
+    apply_post_transforms = BuildEnvironment.apply_post_transforms
+
+    def timed_apply_post_transforms(*args: Any, **kwargs: Any) -> None:
+        nonlocal resolve
+        start = time.perf_counter()
+        apply_post_transforms(*args, **kwargs)
+        resolve += time.perf_counter() - start
+
+    def mark(name: str) -> Callable[..., None]:
+        def handler(*_: Any) -> None:
+            marks.setdefault(name, time.perf_counter())
+        return handler
+
+    app.connect('env-before-read-docs', mark('read'))
+    app.connect('env-updated', mark('updated'))
+    app.connect('build-finished', mark('finished'))
+
+    # Resolving references and emitting doctree-resolved both happen in apply_post_transforms,
+    # which is patched on the class because the environment itself is pickled during the build
+    with mock.patch.object(BuildEnvironment, 'apply_post_transforms', timed_apply_post_transforms):
+        start = time.perf_counter()
+        app.build()
+
+    return {
+        'read': marks['updated'] - marks['read'],
+        'resolve': resolve,
+        'write': marks['finished'] - marks['updated'] - resolve,
+        'total': marks['finished'] - start,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    """Runs the benchmarks as configured by the command line arguments `argv`."""
+    parser = argparse.ArgumentParser(description='Synthetic benchmarks for inline_reference.')
+    parser.add_argument('--docs', type=int, default=100, help='number of documents')
+    parser.add_argument('--targets', type=int, default=20, help='targets per document')
+    parser.add_argument('--refs', type=int, default=50, help='references to targets per document')
+    parser.add_argument('--backlinks', type=int, default=2, help='backlinks per document')
+    parser.add_argument('--fan-in', type=int, default=20, help='references to each backlink')
+    parser.add_argument('--mrefs', type=int, default=5, help='mutual reference pairs per document')
+    parser.add_argument('--builders', default='html,text,latex',
+                        help='comma-separated list of builders')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='number of builds per builder; the fastest of each phase is reported')
+    parser.add_argument('--parallel', type=int, default=1, help='number of parallel processes')
+    parser.add_argument('--seed', type=int, default=0, help='seed for placing references')
+    parser.add_argument('--output', type=Path, help='file to write the JSON results to')
+    args = parser.parse_args(argv)
+
+    config = {key: value for key, value in vars(args).items() if key != 'output'}
+    results = {
+        'config': config,
+        'python': platform.python_version(),
+        'sphinx': sphinx.__display_version__,
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        srcdir = Path(tmpdir) / 'project'
+        generate_project(srcdir, args.docs, args.targets, args.refs, args.backlinks, args.fan_in,
+                         args.mrefs, args.seed)
+
+        for builder in args.builders.split(','):
+            runs = [time_build(srcdir, builder, args.parallel) for _ in range(args.repeat)]
+            results['results'][builder] = {
+                phase: min(run[phase] for run in runs) for phase in runs[0]
+            }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n')
+    else:
+        print(output)
+
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
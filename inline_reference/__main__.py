@@ -0,0 +1,60 @@
+"""
+Command line interface of the ``inline_reference`` package.
+
+Currently provides only the ``check`` command, see `inline_reference.check`::
+
+    python -m inline_reference check [--jobs N] [--suffix .rst] [--namespaces] [PATH ...]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from .check import check_files, find_sources
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Runs the command line interface.
+
+    Parameters
+    ----------
+    argv
+        The command line arguments, by default those of the process.
+
+    Returns
+    -------
+    status
+        The exit status: 0 if no problems were found, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog='python -m inline_reference')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    check = commands.add_parser('check', help='check the :iref: roles in reStructuredText sources '
+                                              'without building the documentation')
+    check.add_argument('paths', nargs='*', default=['.'],
+                       help='source files, or directories to search for them (default: .)')
+    check.add_argument('--jobs', '-j', type=int, default=None,
+                       help='number of processes to scan the files with (default: number of CPUs)')
+    check.add_argument('--suffix', default='.rst',
+                       help='suffix of the source files in the directories (default: .rst)')
+    check.add_argument('--namespaces', action='store_true',
+                       help='qualify the IDs with their namespaces, as with the '
+                            'inline_reference_namespaces configuration value')
+
+    args = parser.parse_args(argv)
+
+    filenames = find_sources(args.paths, args.suffix)
+    problems = 0
+    for filename, lineno, message in check_files(filenames, args.jobs, args.namespaces):
+        print(f'{filename}:{lineno}: {message}')
+        problems += 1
+
+    if problems:
+        print(f'{problems} problems found in {len(filenames)} files', file=sys.stderr)
+
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
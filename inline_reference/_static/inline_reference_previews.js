@@ -0,0 +1,50 @@
+/*
+ * Hover previews of the targets of :iref: links.
+ *
+ * The links to targets with a preview have a class "iref-preview-<chunk>", naming the JSON file
+ * with the previews of the targets in the document of the target. The file is fetched the first
+ * time any link to the document is hovered over, and the preview is set as the title of the link.
+ */
+(function () {
+    'use strict';
+
+    const PREFIX = 'iref-preview-';
+    const chunks = {};
+
+    function contentRoot() {
+        const root = document.documentElement.dataset.content_root;
+        if (root !== undefined) {
+            return root;
+        }
+        return (typeof DOCUMENTATION_OPTIONS !== 'undefined' && DOCUMENTATION_OPTIONS.URL_ROOT) || '';
+    }
+
+    function loadChunk(chunk) {
+        if (!(chunk in chunks)) {
+            chunks[chunk] = fetch(contentRoot() + '_static/iref-previews/' + chunk + '.json')
+                .then(function (response) { return response.ok ? response.json() : {}; })
+                .catch(function () { return {}; });
+        }
+        return chunks[chunk];
+    }
+
+    document.addEventListener('mouseover', function (event) {
+        const link = event.target.closest && event.target.closest('a[class*="' + PREFIX + '"]');
+        if (!link || link.dataset.irefPreview) {
+            return;
+        }
+        link.dataset.irefPreview = 'loading';
+
+        const name = Array.from(link.classList).find(function (name) {
+            return name.startsWith(PREFIX);
+        });
+        const anchor = decodeURIComponent(link.hash.slice(1));
+
+        loadChunk(name.slice(PREFIX.length)).then(function (previews) {
+            if (anchor in previews) {
+                link.title = previews[anchor];
+            }
+            link.dataset.irefPreview = 'loaded';
+        });
+    });
+})();
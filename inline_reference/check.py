@@ -0,0 +1,302 @@
+"""
+Standalone checker of the ``:iref:`` roles in reStructuredText sources.
+
+Finds the same problems that `check_consistency` reports during a sphinx build, but by scanning the
+source files directly, without sphinx, so that it is fast enough to run e.g. as a pre-commit hook::
+
+    python -m inline_reference check docs/source
+
+The roles are found with a regular expression that accepts the same ``title<id>`` syntax that the
+roles parse, as well as the title-less ``:iref:ref:`id``` that sphinx accepts for references.
+Since the files are not parsed as reStructuredText, roles inside literal blocks and comments are
+also counted. With ``--namespaces``, the IDs are qualified with the namespaces set by the
+``iref:namespace`` directive, like the ``inline_reference_namespaces`` configuration value does.
+
+The targets of ``iref:literal`` blocks are found from the ``:pattern:``, ``:lines:``, ``:prefix:``
+and ``:file:`` options of the blocks, with the same `find_spans` that the directive uses.
+"""
+from __future__ import annotations
+
+import os
+import re
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .literal import find_spans
+
+
+# ``:iref:ref:`` is an `XRefRole`, which also accepts an ID without a title (``:iref:ref:`id```)
+# and creates no reference if the text starts with ``!``
+ROLE_PATTERN = re.compile(
+    r'^[ \t]*\.\. iref:namespace::[ \t]*(?P<namespace>\S+)'
+    r'|^(?P<literal>[ \t]*)\.\. iref:literal::[ \t]*$'
+    r'|:iref:(?P<role>ref|target|backlink|mref):`(?P<disabled>!?)'
+    r'(?:(?P<title>[^`<]*)<(?P<id>[^`>]*)>|(?P<plain_id>[^`<>]+))`',
+    re.MULTILINE
+)
+
+# An option of a directive, e.g. ``:prefix: conf-``
+OPTION_PATTERN = re.compile(r'[ \t]*:([\w-]+):(.*)$')
+
+
+def scan_file(filename: str, namespaces: bool = False) -> list[tuple[str, str, int]]:
+    """
+    Finds all ``:iref:`` roles in a file.
+
+    Parameters
+    ----------
+    filename
+        The path to the file.
+    namespaces
+        Whether to qualify the IDs with their namespaces, see
+        `InlineReferenceDomain.qualify_signature`.
+
+    Returns
+    -------
+    roles
+        The type (e.g. 'ref'), ID and line number of each role in the file, in order.
+    """
+    with open(filename, encoding='utf-8') as f:
+        text = f.read()
+
+    line_starts = [0]
+    line_starts.extend(match.end() for match in re.finditer('\n', text))
+
+    lines = None
+    roles = []
+    namespace = ''
+    for match in ROLE_PATTERN.finditer(text):
+        if match.group('namespace') is not None:
+            namespace = match.group('namespace')
+            continue
+
+        if match.group('literal') is not None:
+            if lines is None:
+                lines = text.splitlines()
+
+            lineno = bisect_right(line_starts, match.start())
+            for signature, target_line in scan_literal_block(filename, lines, lineno,
+                                                             len(match.group('literal'))):
+                if namespaces:
+                    signature = _qualify(signature, namespace)
+                roles.append(('target', signature, target_line))
+            continue
+
+        role = match.group('role')
+        if role == 'ref':
+            if match.group('disabled'):
+                continue
+        elif match.group('id') is None:
+            # Only references can be written without a title
+            continue
+
+        signature = ' '.join((match.group('id') or match.group('plain_id')).split())
+        if namespaces:
+            signature = _qualify(signature, namespace)
+
+        roles.append((role, signature, bisect_right(line_starts, match.start())))
+
+    return roles
+
+
+def _qualify(signature: str, namespace: str) -> str:
+    """Qualifies `signature` with `namespace`, see `InlineReferenceDomain.qualify_signature`."""
+    if signature.startswith(':'):
+        return signature[1:]
+    if namespace and ':' not in signature:
+        return f'{namespace}:{signature}'
+    return signature
+
+
+def scan_literal_block(filename: str,
+                       lines: list[str],
+                       lineno: int,
+                       indent: int) -> list[tuple[str, int]]:
+    """
+    Finds the targets of an ``iref:literal`` block.
+
+    The block is parsed like docutils parses a directive: the options are the field list directly
+    after the directive, and the content is the rest of the lines indented more than the directive.
+    Blocks with invalid options, or whose file cannot be read, have no targets, since the build
+    reports them anyway.
+
+    Parameters
+    ----------
+    filename
+        The path to the file containing the block.
+    lines
+        The lines of the file.
+    lineno
+        The line of the directive, counted from 1.
+    indent
+        The indentation of the directive.
+
+    Returns
+    -------
+    targets
+        The ID, with the prefix of the block, and the line of each target. The targets of a block
+        read from a file are placed on the line of the directive.
+    """
+    end = lineno
+    while end < len(lines) and (not lines[end].strip()
+                                or len(lines[end]) - len(lines[end].lstrip()) > indent):
+        end += 1
+
+    options: dict[str, str] = {}
+    start = lineno
+    if start < end and lines[start].lstrip().startswith(':'):
+        name = None
+        while start < end and lines[start].strip():
+            option = OPTION_PATTERN.match(lines[start])
+            if option is not None:
+                name = option.group(1)
+                options[name] = option.group(2).strip()
+            elif name is not None:
+                options[name] = f'{options[name]} {lines[start].strip()}'.strip()
+            start += 1
+
+    if 'file' in options:
+        path = options['file'].replace(' ', '')
+        if path.startswith('/'):
+            path = os.path.join(_find_srcdir(filename), path[1:])
+        else:
+            path = os.path.join(os.path.dirname(filename), path)
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                content = f.read().splitlines()
+        except OSError:
+            return []
+
+        content_lines = [lineno] * len(content)
+    else:
+        while start < end and not lines[start].strip():
+            start += 1
+
+        content = lines[start:end]
+        while content and not content[-1].strip():
+            content.pop()
+
+        margin = min((len(line) - len(line.lstrip()) for line in content if line.strip()),
+                     default=0)
+        content = [line[margin:] for line in content]
+        content_lines = list(range(start + 1, start + 1 + len(content)))
+
+    try:
+        spans = find_spans(content, options.get('pattern'), options.get('lines', ''))
+    except ValueError:
+        return []
+
+    prefix = options.get('prefix', '')
+    return [(prefix + signature, content_lines[line])
+            for line in sorted(spans) for _, _, signature in spans[line]]
+
+
+def _find_srcdir(filename: str) -> str:
+    """
+    Returns the source directory of the project containing `filename`, to which the paths starting
+    with ``/`` are relative: the closest directory with a ``conf.py``, or else the directory of the
+    file.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    while not os.path.isfile(os.path.join(directory, 'conf.py')):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return os.path.dirname(filename)
+        directory = parent
+
+    return directory
+
+
+def find_sources(paths: Iterable[str], suffix: str = '.rst') -> list[str]:
+    """
+    Finds the source files in `paths`.
+
+    Parameters
+    ----------
+    paths
+        The paths to files and directories. Directories are searched recursively for files with
+        the `suffix`.
+    suffix
+        The suffix of the source files.
+
+    Returns
+    -------
+    filenames
+        The paths to the source files, sorted.
+    """
+    filenames = set()
+    for root in paths:
+        if os.path.isfile(root):
+            filenames.add(root)
+            continue
+
+        for directory, _, files in os.walk(root):
+            filenames.update(os.path.join(directory, file)
+                             for file in files if file.endswith(suffix))
+
+    return sorted(filenames)
+
+
+def check_files(filenames: list[str],
+                jobs: int | None = None,
+                namespaces: bool = False) -> Iterator[tuple[str, int, str]]:
+    """
+    Checks the ``:iref:`` roles in all of the files together.
+
+    Finds the following problems, the same as `check_consistency`:
+
+    * ``:iref:target:`` and ``:iref:backlink:`` that share an ID
+    * ``:iref:mref:`` IDs that are used only once
+    * ``:iref:ref:`` whose ID does not match any ``:iref:target:`` or ``:iref:backlink:``
+
+    Parameters
+    ----------
+    filenames
+        The paths to the files.
+    jobs
+        The number of processes to scan the files with. By default, the number of CPUs. Files are
+        scanned in this process if it is 1.
+    namespaces
+        Whether to qualify the IDs with their namespaces.
+
+    Yields
+    ------
+    problem
+        The path to the file and the line number where each problem is found, and a description of
+        the problem, in the order listed above.
+    """
+    scan = partial(scan_file, namespaces=namespaces)
+
+    if jobs == 1 or len(filenames) < 2:
+        results = [scan(filename) for filename in filenames]
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(filenames) // (4 * jobs))
+        with ProcessPoolExecutor(jobs) as executor:
+            results = list(executor.map(scan, filenames, chunksize=chunksize))
+
+    targets: dict[str, list[tuple[str, int]]] = {}
+    mutual_refs: dict[str, list[tuple[str, int]]] = {}
+    loose_refs: dict[str, list[tuple[str, int]]] = {}
+    stores = {'target': targets, 'backlink': targets, 'mref': mutual_refs, 'ref': loose_refs}
+
+    for filename, roles in zip(filenames, results):
+        for role, signature, lineno in roles:
+            stores[role].setdefault(signature, []).append((filename, lineno))
+
+    for signature, locations in targets.items():
+        if len(locations) > 1:
+            others = ', '.join(f'{filename}:{lineno}' for filename, lineno in locations[:-1])
+            yield (*locations[-1], f'duplicate target "{signature}", also defined at {others}')
+
+    for signature, locations in mutual_refs.items():
+        if len(locations) < 2:
+            yield (*locations[0], f'mutual reference "{signature}" does not have a pair')
+
+    for signature, locations in loose_refs.items():
+        if signature not in targets:
+            for filename, lineno in locations:
+                yield filename, lineno, f'reference "{signature}" not found'
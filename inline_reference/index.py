@@ -0,0 +1,125 @@
+"""
+Opt-in SQLite index of the ``:iref:`` roles of a project.
+
+When the ``inline_reference_index`` configuration value is set, the domain data is written into
+``inline_reference.sqlite`` in the output directory at the end of each build, so that other tools
+can look up targets and references without sphinx. The database contains three tables, each
+indexed by ``signature`` and by ``docname``:
+
+* ``targets`` (``signature``, ``docname``, ``type``, ``lineno``, ``title``), with a row for each
+  ``:iref:target:`` and ``:iref:backlink:``
+* ``refs`` (``signature``, ``docname``, ``count``), with the number of ``:iref:ref:`` to each
+  signature in each document
+* ``mutual_refs`` (``signature``, ``docname``, ``count``), with the number of ``:iref:mref:`` with
+  each signature in each document
+
+For example, the documents referencing ``id1`` are found with::
+
+    SELECT docname, count FROM refs WHERE signature = 'id1'
+
+The database also records the version of each document with ``:iref:`` roles in a ``documents``
+table (``docname``, ``version``), the time the document was last read by sphinx. After the first
+build, only the rows of the documents whose version differs from the one in the database, or which
+no longer have any roles, are replaced. Since the versions are compared with the database itself,
+the index is also brought up to date after builds that did not write it, e.g. builds that failed or
+used another builder with the same doctree directory.
+"""
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Mapping
+from typing import Any
+
+
+# Stored in the database as ``PRAGMA user_version``; a database with a different version is rebuilt
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE targets (signature TEXT, docname TEXT, type TEXT, lineno INTEGER, title TEXT);
+CREATE TABLE refs (signature TEXT, docname TEXT, count INTEGER);
+CREATE TABLE mutual_refs (signature TEXT, docname TEXT, count INTEGER);
+CREATE TABLE documents (docname TEXT PRIMARY KEY, version);
+CREATE INDEX targets_signature ON targets (signature);
+CREATE INDEX targets_docname ON targets (docname);
+CREATE INDEX refs_signature ON refs (signature);
+CREATE INDEX refs_docname ON refs (docname);
+CREATE INDEX mutual_refs_signature ON mutual_refs (signature);
+CREATE INDEX mutual_refs_docname ON mutual_refs (docname);
+"""
+
+
+def write_index(filename: str,
+                data: Mapping[str, Any],
+                versions: Mapping[str, Any],
+                target_types: Mapping[int, str]) -> int:
+    """
+    Brings the database in `filename` up to date with the domain `data`.
+
+    The rows of the documents whose version in `versions` differs from the one stored in the
+    database are replaced with the rows from `data`, and the rows of the documents that are no
+    longer in `data` are removed. If the database does not exist yet or was created with a
+    different schema, it is created from all of `data` instead.
+
+    Parameters
+    ----------
+    filename
+        The path to the database.
+    data
+        The domain data of `InlineReferenceDomain`.
+    versions
+        The version of each document in the ``documents`` of `data`, which changes whenever the
+        document is read again.
+    target_types
+        The name of the type of target for each of the codes stored in `data`.
+
+    Returns
+    -------
+    written
+        The number of documents whose rows were written or removed.
+    """
+    with sqlite3.connect(filename) as connection:
+        version = connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            for table in ('targets', 'refs', 'mutual_refs', 'documents'):
+                connection.execute(f'DROP TABLE IF EXISTS {table}')
+
+            connection.executescript(SCHEMA)
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+        stored = dict(connection.execute('SELECT docname, version FROM documents'))
+        docnames = sorted(
+            {docname for docname in data['documents'] if stored.get(docname) != versions[docname]}
+            | (stored.keys() - data['documents'].keys())
+        )
+
+        for table in ('targets', 'refs', 'mutual_refs', 'documents'):
+            connection.executemany(f'DELETE FROM {table} WHERE docname = ?',
+                                   [(docname,) for docname in docnames])
+
+        targets, refs, mutual_refs = [], [], []
+        for docname in docnames:
+            try:
+                owned = data['documents'][docname]
+            except KeyError:
+                continue
+
+            for signature in owned['targets']:
+                targets.extend((signature, docname, target_types[code], lineno, title)
+                               for code, target_doc, lineno, title in data['targets'][signature]
+                               if target_doc == docname)
+
+            refs.extend((signature, docname, data['loose_refs'][signature][docname])
+                        for signature in owned['loose_refs'])
+            mutual_refs.extend((signature, docname, data['mutual_refs'][signature][docname])
+                               for signature in owned['mutual_refs'])
+
+        connection.executemany('INSERT INTO targets VALUES (?, ?, ?, ?, ?)', targets)
+        connection.executemany('INSERT INTO refs VALUES (?, ?, ?)', refs)
+        connection.executemany('INSERT INTO mutual_refs VALUES (?, ?, ?)', mutual_refs)
+        connection.executemany('INSERT INTO documents VALUES (?, ?)',
+                               [(docname, versions[docname])
+                                for docname in docnames if docname in data['documents']])
+
+    connection.close()
+
+    return len(docnames)
@@ -11,6 +11,16 @@ In order to work, this extension adds a number of new classes and functions:
   * ``:iref:backlink:`` which is handled by `BackLinkRole`
   * ``:iref:mref:`` which is handled by `MutualReferenceRole`
 
+* 2 directives within the domain
+
+  * ``.. iref:namespace::``, handled by `NamespaceDirective`, which sets the default namespace of
+    the IDs in a document when namespaces are enabled
+  * ``.. iref:literal::``, handled by `LiteralTargetsDirective`, which creates a literal block with
+    many targets, without parsing it as reStructuredText
+
+* 1 transform, `TermLinkTransform`, which turns the terms of the ``inline_reference_terms``
+  configuration value into references, as if they were written with ``:iref:ref:``
+
 * 5 nodes created by the roles and which handle the creation of the links
 
   * `inline_reference` which identical to the `docutils.nodes.reference` class except for the LaTeX
@@ -27,12 +37,13 @@ In order to work, this extension adds a number of new classes and functions:
 
   * `mutual_ref` which is a new class for working with ``:iref:mref:``
 
-* 2 event hooks for the ``doctree-resolved`` event
+* 1 event hook for the ``doctree-resolved`` event, `process_iref_nodes`, which finds the nodes below
+  in a single traversal of each document that contains them
 
-  * `process_mutual_reference_nodes` for connecting the pairs of `mutual_ref` nodes, once all the
+  * `process_mutual_reference_node` for connecting the pairs of `mutual_ref` nodes, once all the
     nodes have been created.
 
-  * `process_backlink_nodes` for connecting each `backlink` node to each `id_reference` node that
+  * `process_backlink_node` for connecting each `backlink` node to each `id_reference` node that
     links to it.
 
 * various ``visit_`` and ``depart_`` functions that implement the writing of each supported output
@@ -65,9 +76,11 @@ Referencing a Backlink
 By creating a link from ``:iref:ref:name<id>`` to ``:iref:backlink:name<id>``, two nodes are created
 in the middle of the paragraph: a `sphinx.addnodes.pending_xref` node for the reference, and a
 `reference_target` node for the target. On creation of each, they are registered with the domain,
-the reference in the ``loose_refs`` dict and the target in the ``targets`` list. However, since
+the reference in the ``loose_refs`` dict and the target in the ``targets`` dict. However, since
 the reference will need an ID to be able to be linked to, but the only information we have is the ID
-of the backlink, the domain creates a unique ID for the reference when registering it.
+of the backlink, the domain creates a unique ID for the reference when registering it, from the
+position of the reference among the references to the same ID in the document. This position is
+stored on the ``pending_xref`` node, so that nothing has to be assigned once reading is finished.
 
 Then, once the entire .rst document is read and all nodes are finished loading, sphinx starts
 resolving pending references, which calls the `ReferenceDomain.resolve_xref` method for each
@@ -75,11 +88,11 @@ resolving pending references, which calls the `ReferenceDomain.resolve_xref` met
 ``pending_xref`` to the appropriate `backlink`. An `id_reference` node is created with the
 ``refid`` and ``refuri`` parameters set and pointing to the ``ids`` parameter of the `backlink`,
 which will allow for the creation of a hyperlink from the reference to the backlink. To enable the
-converse, the `id_reference` node's ``ids`` parameter is set to the first stored unique ID that has
-not been used yet.
+converse, the `id_reference` node's ``ids`` parameter is set to the unique ID derived from the
+position stored on the ``pending_xref`` node.
 
 Furthermore, once the tree for the document has been fully resolved, sphinx emits the
-``doctree-resolved`` event and calls the `process_backlink_nodes`` function, which finishes the job.
+``doctree-resolved`` event and calls the `process_backlink_node` function, which finishes the job.
 It populates the ``backrefs`` parameter of each `backlink` node with the unique IDs of each
 `id_reference` node, using the data from the domain. All that happens after is that
 the writer for the selected format will appropriately use this information so that a hyperlink is
@@ -95,26 +108,50 @@ the hood (one for each node), the domain also creates a unique ID for each, whic
 set to the ``ids`` parameter of the created nodes.
 
 Then, once the tree for the document has been fully resolved, sphinx emits the ``doctree-resolved``
-event and calls the `process_mutual_reference_nodes` function. This goes over each `mutual_ref` in
-the document and edits its ``refid`` and ``refuri`` parameters to point to the ID of the other
-corresponding `mutual_ref` node. All that happens after is that
+event and calls the `process_mutual_reference_node` function for each `mutual_ref` in the document,
+which edits its ``refid`` and ``refuri`` parameters to point to the ID of the other
+corresponding `mutual_ref` node. The partners of all mutual references are computed once, by
+`InlineReferenceDomain.mutual_partner`. If more than two mutual references share an ID, they form
+a cycle in which each links to the next. All that happens after is that
 the writer for the selected format will appropriately use this information so that a hyperlink is
 created in the output.
 """
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import json
+import os
+import sys
+from base64 import b32encode
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable
+from functools import wraps
+from hashlib import blake2b
+from html import escape
+from os import path
+from time import perf_counter
+from typing import Any, TYPE_CHECKING
 
 from docutils import nodes
+from docutils.parsers.rst import directives
+from docutils.utils import new_document
 
+from sphinx import addnodes
 from sphinx.application import Sphinx
-from sphinx.domains import Domain
+from sphinx.domains import Domain, ObjType
 from sphinx.roles import XRefRole
+from sphinx.transforms import SphinxTransform
 from sphinx.util import logging
-from sphinx.util.docutils import SphinxRole
+from sphinx.util.docutils import SphinxDirective, SphinxRole
 
+from .index import write_index
+from .literal import find_spans
+from .previews import extract_snippet, write_previews
+from .stats import BuildStats, format_report
+from .suggest import SignatureIndex, format_suggestions
+from .terms import TermMatcher
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Set
     from sphinx.builders import Builder
     from sphinx.environment import BuildEnvironment
     from sphinx.addnodes import pending_xref, document
@@ -123,6 +160,17 @@ if TYPE_CHECKING:
 
 LOGGER = logging.getLogger(__name__)
 
+# The integer codes under which the types of targets are stored in the domain data
+LOOSEREF = 0
+BACKLINK = 1
+TARGET_CODES = {'looseref': LOOSEREF, 'backlink': BACKLINK}
+
+# The object types of the targets, see `InlineReferenceDomain.get_objects`
+TARGET_TYPES = {LOOSEREF: 'target', BACKLINK: 'backlink'}
+
+# The name of the page listing all references to the backlinks with too many to show inline
+BACKREFS_PAGE = 'iref-backrefs'
+
 
 class id_reference(nodes.reference):
     """A reference node that contains the ``ids`` parameter."""
@@ -134,6 +182,92 @@ class inline_reference(nodes.reference):
     pass
 
 
+class RelativeURICache:
+    """
+    Bounded cache of the relative URIs between pairs of documents, with LRU eviction.
+
+    The relative URI only depends on the builder and on the two documents, but is needed for each
+    reference, backreference and mutual reference across documents, so the builder is asked only
+    once for each pair that is in the cache.
+
+    Attributes
+    ----------
+    maxsize
+        The maximum number of URIs held in the cache. The least recently used URI is evicted first.
+    hits
+        The number of URIs returned from the cache.
+    misses
+        The number of URIs that had to be obtained from the builder.
+    """
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[tuple[Builder, str, str], str] = OrderedDict()
+
+    def get(self, builder: Builder, fromdocname: str, todocname: str) -> str:
+        """
+        Returns the URI of `todocname` relative to `fromdocname`.
+
+        Parameters
+        ----------
+        builder
+            The Sphinx builder that is being used.
+        fromdocname
+            The name of the document from which the URI is relative.
+        todocname
+            The name of the document to which the URI points.
+
+        Returns
+        -------
+        uri
+            The relative URI, as given by ``builder.get_relative_uri``.
+        """
+        key = (builder, fromdocname, todocname)
+
+        try:
+            uri = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            uri = self._cache[key] = builder.get_relative_uri(fromdocname, todocname)
+
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        return uri
+
+    def clear(self) -> None:
+        """Empties the cache and resets the hit and miss counts."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def get_relative_uri(builder: Builder, fromdocname: str, todocname: str) -> str:
+    """
+    Returns the URI of `todocname` relative to `fromdocname`, using the cache of the iref domain.
+
+    Parameters
+    ----------
+    builder
+        The Sphinx builder that is being used.
+    fromdocname
+        The name of the document from which the URI is relative.
+    todocname
+        The name of the document to which the URI points.
+
+    Returns
+    -------
+    uri
+        The relative URI.
+    """
+    domain: InlineReferenceDomain = builder.env.get_domain('iref')
+    return domain.uri_cache.get(builder, fromdocname, todocname)
+
+
 def make_refnode(
     builder: Builder,
     fromdocname: str,
@@ -179,10 +313,10 @@ def make_refnode(
     if  fromdocname != todocname:
         if targetid:
             node['refuri'] = (
-                builder.get_relative_uri(fromdocname, todocname) + '#' + targetid
+                get_relative_uri(builder, fromdocname, todocname) + '#' + targetid
             )
         else:
-            node['refuri'] = builder.get_relative_uri(fromdocname, todocname)
+            node['refuri'] = get_relative_uri(builder, fromdocname, todocname)
     if title:
         node['reftitle'] = title
     node += replace_literal_nodes(child)
@@ -250,8 +384,7 @@ def visit_reference_node_latex(self: nodes.NodeVisitor, node: nodes.reference) -
     default implementation (which uses ``\hyperref``), but this version has to supercede because
     ``\hyperref`` does not work with ``\hypertarget`` that this package relies on in LaTeX.
     """
-    ref_id = str(self.idescape(node['refid']))
-    self.body.append(r'\hyperlink{' + ref_id + '}{')
+    self.body.append(r'\hyperlink{' + escape_id_latex(self, node['refid']) + '}{')
 
 
 def depart_reference_node_latex(self: nodes.NodeVisitor, _: nodes.reference) -> None:
@@ -267,12 +400,24 @@ class RegisteredXRefRole(XRefRole):
     integrates with the domain defined in this package. This is necessary to support the
     `backlink` functionality.
     """
-    def run(self) -> tuple[list[nodes.Node], list[nodes.system_message]]:
-        """Creates a pending reference node and registers the data with the domain."""
-        _, signature = self.text.replace('>', '').split('<')
-        domain: InlineReferenceDomain = self.env.get_domain('iref')
-        domain.add_loose_reference(self.env.docname, signature)
-        return super().run()
+    def result_nodes(self,
+                     document: nodes.document,
+                     env: BuildEnvironment,
+                     node: nodes.Element,
+                     is_ref: bool) -> tuple[list[nodes.Node], list[nodes.system_message]]:
+        """
+        Registers the pending reference `node` with the domain.
+
+        The position of the reference among the references to the same target in the document,
+        from which the unique ID of the reference is derived, is stored on the `node` as
+        ``iref_serialno``, so that resolving the reference does not depend on the order in which
+        the references are resolved.
+        """
+        domain: InlineReferenceDomain = env.get_domain('iref')
+        node['reftarget'] = domain.qualify_signature(node['reftarget'])
+        node['iref_serialno'] = domain.add_loose_reference(env.docname, node['reftarget'],
+                                                           node.line)
+        return [node], []
 
 
 class mutual_ref(nodes.General,
@@ -296,8 +441,7 @@ def visit_mutual_ref_node_latex(self: nodes.NodeVisitor, node: mutual_ref) -> No
     Creates a LaTeX hyperlink that also contains a hypertarget for each ``id`` that the `node`
     contains.
     """
-    ref_id = str(self.idescape(node['refid']))
-    self.body.append(r'\hyperlink{' + ref_id + r'}{')
+    self.body.append(r'\hyperlink{' + escape_id_latex(self, node['refid']) + r'}{')
     visit_reference_target_node_latex(self, node)
 
 
@@ -317,7 +461,8 @@ class MutualReferenceRole(SphinxRole):
         """Creates a `mutual_ref` node and registers with the domain."""
         text, signature = self.text.replace('>', '').split('<')
         domain: InlineReferenceDomain = self.env.get_domain('iref')
-        anchor = domain.add_mutual_reference(signature)
+        signature = domain.qualify_signature(signature)
+        anchor = domain.add_mutual_reference(signature, self.lineno)
 
         node = mutual_ref(text=text, refid=anchor, ids=[signature, anchor], title=text)
 
@@ -338,9 +483,11 @@ def visit_reference_target_node_html(self: nodes.NodeVisitor, node: reference_ta
     """
     Visit `reference_target` node in the HTML writer.
 
-    This method creates the ``a`` HTML tag that uses CSS such that the text does not appear like a
-    hyperlink but like the surrounding text, but including the ``id`` property to allow the text to
-    be hyperlinked to.
+    This method creates the ``a`` HTML tag with the ``iref-target`` class, which is styled by the
+    stylesheet of this package such that the text does not appear like a hyperlink but like the
+    surrounding text, but including the ``id`` property to allow the text to be hyperlinked to. For
+    themes that cannot load the stylesheet, the style can instead be set on each tag, see
+    `init_static_files`.
     """
     try:
         classes = node['classes']
@@ -348,7 +495,10 @@ def visit_reference_target_node_html(self: nodes.NodeVisitor, node: reference_ta
     except KeyError:
         classes = []
 
-    atts = {'style': 'color: inherit; text-decoration: inherit'}
+    atts = {'class': 'iref-target'}
+    if self.config.inline_reference_inline_style:
+        atts['style'] = 'color: inherit; text-decoration: inherit'
+
     self.body.append(self.starttag(node, 'a', '', **atts))
 
     node['classes'] = classes
@@ -364,15 +514,69 @@ def visit_reference_target_node_latex(self: nodes.NodeVisitor, node: reference_t
     Visit `reference_target` for LaTeX writer.
 
     Creates a ``\hypertarget`` value for each ``id`` in the `node`, with the text that appears in
-    the document being the text in the node.
+    the document being the text in the node. Only the first ``id`` wraps the text, the others are
+    empty ``\hypertarget`` values placed before it, so that the targets are not nested.
     """
-    for id in node['ids']:
-        self.body.append(r'\hypertarget{' + str(self.idescape(id)) + '}{')
+    self.body.append(hypertargets_latex(self, node['ids']))
 
 
 def depart_reference_target_node_latex(self: nodes.NodeVisitor, node: reference_target) -> None:
     """Depart `reference_target` for LaTeX writer."""
-    self.body.append('}' * len(node['ids']))
+    if node['ids']:
+        self.body.append('}')
+
+
+def escape_id_latex(self: nodes.NodeVisitor, id: str) -> str:
+    """
+    Returns the `id` escaped for use in LaTeX by the LaTeX writer.
+
+    The escaped form of each ID is cached in the writer, since the same IDs are used by both the
+    hyperlinks and their targets.
+
+    Parameters
+    ----------
+    id
+        The ID.
+
+    Returns
+    -------
+    escaped
+        The escaped ID.
+    """
+    try:
+        cache = self._iref_escaped_ids
+    except AttributeError:
+        cache = self._iref_escaped_ids = {}
+
+    try:
+        return cache[id]
+    except KeyError:
+        escaped = cache[id] = str(self.idescape(id))
+        return escaped
+
+
+def hypertargets_latex(self: nodes.NodeVisitor, ids: list[str]) -> str:
+    r"""
+    Returns the opening of a ``\hypertarget`` for each of the `ids`.
+
+    Only the ``\hypertarget`` of the first ID is left open, to be closed with a single ``}`` after
+    the text it wraps. The others are empty and placed before it.
+
+    Parameters
+    ----------
+    ids
+        The IDs.
+
+    Returns
+    -------
+    latex
+        The LaTeX code.
+    """
+    if not ids:
+        return ''
+
+    empty = ''.join(r'\hypertarget{' + escape_id_latex(self, id) + '}{}' for id in ids[1:])
+    return empty + r'\hypertarget{' + escape_id_latex(self, ids[0]) + '}{'
 
 
 class backlink(nodes.TextElement, nodes.Targetable, nodes.Inline, nodes.BackLinkable):
@@ -410,12 +614,23 @@ def depart_backlink_node_html(self: nodes.NodeVisitor, node: backlink) -> None:
     Depart `backlink` for HTML writer.
 
     If the `node` contains fewer than 2 backrefs, the ``a`` HTML tag is simply closed. Otherwise,
-    a series of subscript numbers, each containing a link to one of the backrefs, is created.
+    a series of subscript numbers, each containing a link to one of the backrefs, is created. If
+    there are more backrefs than the ``inline_reference_backlink_limit`` configuration value, only
+    that many are shown, followed by an ellipsis linking to the backlink's entry on the page that
+    lists all of them (see `collect_backrefs_page`).
     """
     backrefs = node.get('backrefs', [])
 
     if len(backrefs) > 1:
-        elements = [f'<a href={ref}><sub>{i}</sub></a>' for i, ref in enumerate(backrefs)]
+        shown = truncate_backrefs(backrefs, self.config.inline_reference_backlink_limit)
+        elements = [f'<a href={ref}><sub>{i}</sub></a>' for i, ref in enumerate(shown)]
+
+        if len(shown) < len(backrefs):
+            if 'backrefs_page' in node:
+                elements.append(f'<a href={node["backrefs_page"]}><sub>…</sub></a>')
+            else:
+                elements.append('<sub>…</sub>')
+
         self.body.append(','.join(elements))
     else:
         self.body.append('</a>')
@@ -435,8 +650,7 @@ def visit_backlink_node_latex(self: nodes.NodeVisitor, node: backlink) -> None:
         node['refid'] = backrefs[0].split('#', 1)[-1]
         visit_mutual_ref_node_latex(self, node)
     else:
-        for id in node['ids']:
-            self.body.append(r'\hypertarget{' + str(self.idescape(id)) + '}{')
+        visit_reference_target_node_latex(self, node)
 
 
 def depart_backlink_node_latex(self: nodes.NodeVisitor, node: backlink) -> None:
@@ -445,25 +659,58 @@ def depart_backlink_node_latex(self: nodes.NodeVisitor, node: backlink) -> None:
 
     Similar to `depart_backlink_node_html` in that the LaTeX tag is simply closed for 0-1 backrefs,
     and for more, a list of subscript numbers hyperlinking to each hyperlink linking to the `node`,
-    is created.
+    is created. The list is truncated to the ``inline_reference_backlink_limit`` configuration value
+    and ended with an ellipsis if there are more backrefs, which links to the backlink's section in
+    the appendix listing all of them (see `append_backrefs_appendix`).
     """
     backrefs = node.get('backrefs', [])
 
     if len(backrefs) == 1:
         depart_mutual_ref_node_latex(self, node)
     else:
-        self.body.append('}' * len(node['ids']))
+        depart_reference_target_node_latex(self, node)
 
         if len(backrefs) > 1:
+            shown = truncate_backrefs(backrefs, self.config.inline_reference_backlink_limit)
+
             elements = []
-            for i, ref in enumerate(backrefs):
+            for i, ref in enumerate(shown):
                 # resolve_backlinks prepends each backref with %docname# - we want to remove this
-                ref_id = str(self.idescape(ref.split('#', 1)[-1]))
+                ref_id = escape_id_latex(self, ref.split('#', 1)[-1])
                 elements.append(r'\hyperlink{' + ref_id + '}{' + str(i) + '}')
 
+            if len(shown) < len(backrefs):
+                if 'backrefs_page' in node:
+                    page_id = escape_id_latex(self, node['backrefs_page'])
+                    elements.append(r'\hyperlink{' + page_id + r'}{\ldots}')
+                else:
+                    elements.append(r'\ldots')
+
             self.body.append(r'\texorpdfstring{\textsubscript{' + ','.join(elements) + '}}{}')
 
 
+def truncate_backrefs(backrefs: list[str], limit: int) -> list[str]:
+    """
+    Returns the backrefs of a `backlink` node that are shown inline.
+
+    Parameters
+    ----------
+    backrefs
+        All the backrefs of the node.
+    limit
+        The maximum number of backrefs to show, or 0 for no limit.
+
+    Returns
+    -------
+    shown
+        The first `limit` backrefs.
+    """
+    if limit and len(backrefs) > limit:
+        return backrefs[:limit]
+
+    return backrefs
+
+
 class TargetRole(SphinxRole):
     """
     Base class for target roles, or roles specifically for being cross-linked to.
@@ -484,7 +731,8 @@ class TargetRole(SphinxRole):
         """Creates a target node - node with ``id`` so that it can be linked to."""
         text, signature = self.text.replace('>', '').split('<')
         domain: InlineReferenceDomain = self.env.get_domain('iref')
-        domain.add_reference_target(signature, self.code)
+        signature = domain.qualify_signature(signature)
+        domain.add_reference_target(signature, self.code, self.lineno, text)
 
         node = self.target_class(text=text, refid=signature, ids=[signature], title=text)
 
@@ -503,6 +751,176 @@ class BackLinkRole(TargetRole):
     code = 'backlink'
 
 
+class NamespaceDirective(SphinxDirective):
+    """
+    Directive setting the default namespace of the ``:iref:`` IDs in the rest of the document.
+
+    Only has an effect if namespaces are enabled in the configuration, see
+    `InlineReferenceDomain.qualify_signature`.
+    """
+    required_arguments = 1
+
+    def run(self) -> list[nodes.Node]:
+        """Sets the namespace in the reference context of the document."""
+        self.env.ref_context['iref:namespace'] = self.arguments[0]
+        return []
+
+
+class LiteralTargetsDirective(SphinxDirective):
+    """
+    Directive for a literal block with many targets.
+
+    The block is written like a ``parsed-literal``, but its contents are not parsed as
+    reStructuredText. Instead, the targets are declared in bulk by the options: ``:pattern:`` is a
+    regular expression matched against each line, which turns each match (or its first group, if it
+    has any) into a target with the matched text as the ID, and ``:lines:`` lists the numbers of
+    whole lines to turn into targets with the given IDs (e.g. ``:lines: 3 setup, 10 teardown``).
+    The IDs are prefixed with ``:prefix:``, if given. The contents can also be read from a file with
+    ``:file:``.
+
+    The targets are found by `find_spans`, which the standalone checker also uses. All targets are
+    registered with the domain at once, see `InlineReferenceDomain.add_reference_targets`, and the
+    block is made of `reference_target` nodes for the targets and text for the rest.
+    """
+    has_content = True
+    option_spec = {
+        'pattern': directives.unchanged_required,
+        'lines': directives.unchanged_required,
+        'prefix': directives.unchanged,
+        'file': directives.path,
+    }
+
+    def run(self) -> list[nodes.Node]:
+        """Creates the literal block and registers its targets with the domain."""
+        if 'file' in self.options:
+            relative, absolute = self.env.relfn2path(self.options['file'])
+            self.env.note_dependency(relative)
+            try:
+                with open(absolute, encoding='utf-8') as f:
+                    lines = f.read().splitlines()
+            except OSError as e:
+                raise self.error(f'Could not read file "{self.options["file"]}": {e}')
+
+            first_line = None
+        else:
+            lines = list(self.content)
+            first_line = self.content_offset + 1
+
+        try:
+            spans = find_spans(lines, self.options.get('pattern'), self.options.get('lines', ''))
+        except ValueError as e:
+            raise self.error(str(e))
+
+        prefix = self.options.get('prefix', '')
+        domain: InlineReferenceDomain = self.env.get_domain('iref')
+
+        # A rawsource differing from the text marks the block as parsed, so it is not highlighted
+        block = nodes.literal_block(self.block_text, classes=['iref-literal'])
+        self.set_source_info(block)
+
+        targets = []
+        text = []
+        for lineno, line in enumerate(lines):
+            position = 0
+            for start, end, signature in spans.get(lineno, ()):
+                signature = domain.qualify_signature(prefix + signature)
+                title = line[start:end]
+                text.append(line[position:start])
+                block += nodes.Text(''.join(text))
+                text = []
+
+                block += reference_target(text=title, refid=signature, ids=[signature],
+                                          title=title, iref_preview=line.strip())
+                targets.append((signature, None if first_line is None else first_line + lineno,
+                                title))
+                position = end
+
+            text.append(line[position:] + '\n')
+
+        block += nodes.Text(''.join(text))
+        domain.add_reference_targets(targets, 'looseref')
+
+        return [block]
+
+
+class TermLinkTransform(SphinxTransform):
+    """
+    Links the terms of the ``inline_reference_terms`` configuration value to their targets.
+
+    Each occurrence of a term in the text of a paragraph, including emphasised and strong text but
+    not e.g. literals, titles or existing links, is replaced by the same `pending_xref` node that
+    ``:iref:ref:`` creates, and the reference is registered with the domain in the same way, see
+    `RegisteredXRefRole`. All terms are found in a single pass over each text node, by the
+    `TermMatcher` of the domain.
+    """
+    default_priority = 500
+
+    def apply(self, **kwargs: Any) -> None:
+        """Replaces the terms in the document with references."""
+        terms = self.config.inline_reference_terms
+        if not terms:
+            return
+
+        domain: InlineReferenceDomain = self.env.get_domain('iref')
+        matcher = domain.term_matcher()
+
+        for text in list(self.document.findall(_is_term_text)):
+            value = text.astext()
+            matches = matcher.find(value)
+            if not matches:
+                continue
+
+            parent = text.parent
+            replacement: list[nodes.Node] = []
+            position = 0
+            for start, end in matches:
+                if start > position:
+                    replacement.append(nodes.Text(value[position:start]))
+
+                term = value[start:end]
+                replacement.append(self.make_reference(domain, term, terms[term], parent))
+                position = end
+
+            if position < len(value):
+                replacement.append(nodes.Text(value[position:]))
+
+            parent.replace(text, replacement)
+
+    def make_reference(self,
+                       domain: InlineReferenceDomain,
+                       term: str,
+                       signature: str,
+                       parent: nodes.Element) -> pending_xref:
+        """
+        Creates the reference to `signature` for an occurrence of `term` and registers it with the
+        `domain`.
+
+        The `signature` is qualified as if it was written in a document without a namespace, see
+        `InlineReferenceDomain.qualify_signature`.
+        """
+        signature = domain.qualify_signature(signature, namespace='')
+        node = addnodes.pending_xref(term, refdoc=self.env.docname, refdomain='iref', reftype='ref',
+                                     refexplicit=True, refwarn=False, reftarget=signature)
+        node.source, node.line = parent.source, parent.line
+        node += nodes.literal(term, term, classes=['xref', 'iref', 'iref-ref'])
+        node['iref_serialno'] = domain.add_loose_reference(self.env.docname, signature, node.line)
+        return node
+
+
+def _is_term_text(node: nodes.Node) -> bool:
+    """Returns whether `node` is text in which `TermLinkTransform` looks for terms."""
+    if not isinstance(node, nodes.Text):
+        return False
+
+    parent = node.parent
+    while isinstance(parent, nodes.Inline):
+        if not isinstance(parent, (nodes.emphasis, nodes.strong)):
+            return False
+        parent = parent.parent
+
+    return isinstance(parent, nodes.paragraph)
+
+
 class InlineReferenceDomain(Domain):
     name = 'iref'
     label = 'Inline Reference'
@@ -512,206 +930,1162 @@ class InlineReferenceDomain(Domain):
         'backlink': BackLinkRole(),
         'mref': MutualReferenceRole(),
     }
+    directives = {
+        'namespace': NamespaceDirective,
+        'literal': LiteralTargetsDirective,
+    }
+    object_types = {
+        'target': ObjType('target', 'ref'),
+        'backlink': ObjType('backlink', 'ref'),
+    }
     initial_data = {
-        'targets': [],
+        'targets': {},
         'mutual_refs': {},
         'loose_refs': {},
+        'documents': {},
+        'previews': {},
     }
-    data_version = 0
+    data_version = 9
 
-    def resolve_xref(self,
-                     env: BuildEnvironment,
-                     fromdocname: str,
-                     builder: Builder,
-                     typ: str,
-                     target: str,
-                     node: pending_xref,
-                     contnode: nodes.Element) -> id_reference | inline_reference | None:
+    def __init__(self, env: BuildEnvironment) -> None:
+        super().__init__(env)
+
+        # Resized from the configuration in `init_uri_cache` once the builder is created
+        self.uri_cache = RelativeURICache()
+
+        # The next member of the group of each mutual reference, built on first use by
+        # `mutual_partner` and discarded whenever the mutual references change
+        self._partners: dict[str, tuple[str, str, str]] | None = None
+
+        # The index of the target signatures in each namespace, built on first use by
+        # `suggest_targets` and discarded whenever the targets change
+        self._signature_index: dict[str, SignatureIndex] | None = None
+
+        # What each document that is re-read or removed in this build contributed before that, see
+        # `find_affected_documents`
+        self._previous_contributions: dict[str, dict[str, dict[str, Any]]] = {}
+
+        # The documents read in this build, set by `note_docs_to_read` and used by
+        # `find_affected_documents` and the build statistics
+        self.read_docnames: list[str] = []
+
+        # The matcher of the terms of ``inline_reference_terms``, built on first use by
+        # `term_matcher`
+        self._term_matcher: TermMatcher | None = None
+
+        # Only collected when enabled in the configuration, see `init_stats`
+        self.stats: BuildStats | None = None
+
+        # The documents referring to each missing target and the number of references from each,
+        # only collected when enabled in the configuration, see `init_missing_summary`
+        self.missing: dict[str, Counter[str]] | None = None
+
+    def clear_doc(self, docname: str) -> None:
         """
-        Resolves a pending xref node.
+        Removes all the data registered from the `docname` document.
 
-        Creates a new node that will replace the pending xref `node`. This is done by matching the
-        pending xref `node` to the appropriate ``target`` registered with the domain.
+        Uses the ``documents`` ownership record to only visit the signatures that the document
+        registered, so clearing a document that has not been read yet costs nothing.
 
         Parameters
         ----------
-        env
-            The build environment.
-        fromdocname
-            The name of the document in which `node` is found.
-        builder
-            The sphinx builder being used.
-        typ
-            The name of the pending xref node.
-        target
-            The code/label used to identify the target of the pending xref `node`.
-        node
-            The pending xref node.
-        contnode
-            The node containing the contents of the pending xref `node`.
+        docname
+            The name of the document to remove from the domain.
+        """
+        self.data['previews'].pop(docname, None)
+
+        if docname not in self.data['documents']:
+            return
+
+        self._previous_contributions[docname] = self.document_contributions(docname)
+        owned = self.data['documents'].pop(docname)
+        self._partners = None
+        self._signature_index = None
+
+        targets = self.data['targets']
+        for signature in owned['targets']:
+            # Any target with the same signature that was shadowed by the removed one is restored
+            entries = [entry for entry in targets[signature] if entry[1] != docname]
+
+            if entries:
+                targets[signature] = entries
+            else:
+                del targets[signature]
+
+        for store in ('mutual_refs', 'loose_refs'):
+            for signature in owned[store]:
+                counts = self.data[store][signature]
+                del counts[docname]
+                if not counts:
+                    del self.data[store][signature]
+
+    def document_contributions(self, docname: str) -> dict[str, dict[str, Any]]:
+        """
+        Returns the parts of the domain data registered from the `docname` document that affect the
+        output of other documents.
+
+        Parameters
+        ----------
+        docname
+            The name of the document.
 
         Returns
         -------
-        reference_node
-            The reference node with the target set. None is returned when a match cannot be found.
+        contributions
+            The types of the targets (under 'targets'), and the numbers of references (under
+            'loose_refs') and mutual references (under 'mutual_refs'), registered from the document,
+            each keyed by signature.
+        """
+        try:
+            owned = self.data['documents'][docname]
+        except KeyError:
+            return {'targets': {}, 'loose_refs': {}, 'mutual_refs': {}}
+
+        return {
+            'targets': {
+                signature: tuple(entry[0] for entry in self.data['targets'][signature]
+                                 if entry[1] == docname)
+                for signature in owned['targets']
+            },
+            'loose_refs': {
+                signature: self.data['loose_refs'][signature][docname]
+                for signature in owned['loose_refs']
+            },
+            'mutual_refs': {
+                signature: self.data['mutual_refs'][signature][docname]
+                for signature in owned['mutual_refs']
+            },
+        }
+
+    def find_affected_documents(self) -> set[str]:
         """
-        match = [
-            (sig, code, docname)
-            for sig, code, docname in self.data['targets']
-            if sig == target
-        ]
+        Finds the documents whose output is affected by the changes to the documents read or removed
+        in this build.
 
-        if len(match) == 0:
-            LOGGER.warning(f'inline_reference: Reference "{target}" not found.')
-            return None
+        Compares what each of the changed documents contributed to the domain data before and after
+        it was read, and uses the signatures that changed to look up the documents that depend on
+        them:
 
-        signature, match_type, todocname = match[-1]
+        * if a target changed, the documents referring to it (the ``loose_refs`` graph), whose
+          links may now point elsewhere or nowhere
+        * if the references to a target changed, the documents containing the target as a
+          backlink, whose list of backreferences changed
+        * if a mutual reference changed, the documents containing the other mutual references with
+          the same signature
 
-        # Backlinks require the id param in order to be able to be linked back to
-        if match_type == 'backlink':
-            reference_node = make_refnode(builder, fromdocname, todocname, signature, contnode, signature, id_reference)
+        Returns
+        -------
+        docnames
+            The names of the affected documents.
+        """
+        changed_targets, changed_refs, changed_mrefs = set(), set(), set()
+        empty = {'targets': {}, 'loose_refs': {}, 'mutual_refs': {}}
 
-            for i, (from_doc, id, assigned) in enumerate(self.data['loose_refs'][signature]):
-                if from_doc == fromdocname and not assigned:
-                    break
-            else:
-                return reference_node
+        for docname in set(self._previous_contributions) | set(self.read_docnames):
+            before = self._previous_contributions.get(docname, empty)
+            after = self.document_contributions(docname)
 
-            try:
-                reference_node['ids'].append(id)
-            except KeyError:
-                reference_node['ids'] = [id]
+            for store, changed in (('targets', changed_targets),
+                                   ('loose_refs', changed_refs),
+                                   ('mutual_refs', changed_mrefs)):
+                for signature in before[store].keys() | after[store].keys():
+                    if before[store].get(signature) != after[store].get(signature):
+                        changed.add(signature)
 
-            self.data['loose_refs'][signature][i] = (from_doc, id, True)
-        else:
-            reference_node = make_refnode(builder, fromdocname, todocname, signature, contnode, signature, inline_reference)
+        self._previous_contributions = {}
 
-        return reference_node
+        affected = set()
+        for signature in changed_targets:
+            affected.update(self.data['loose_refs'].get(signature, ()))
+
+        for signature in changed_refs:
+            affected.update(docname
+                            for code, docname, _, _ in self.data['targets'].get(signature, ())
+                            if code == BACKLINK)
+
+        for signature in changed_mrefs:
+            affected.update(self.data['mutual_refs'].get(signature, ()))
+
+        return affected
 
-    def add_mutual_reference(self, signature: str) -> str:
+    def merge_domaindata(self, docnames: Set[str], otherdata: dict[str, Any]) -> None:
         """
-        Adds a mutual reference (`MutualReference`) to the domain and generates a unique ID for the
-        node.
+        Merges the data of `docnames` from the domain data of a parallel reader process.
 
-        Saves the original signature of the node, the name of the document in which the node was
-        found, and the new unique ID, to the domain data for mutual references.
+        Only the entries owned by `docnames` are taken from `otherdata`, since the rest of it is
+        the data that the reader process inherited from this process.
 
-        The unique ID can be used do distinguish between the two `mutual_ref` nodes, since they are
-        created using the same `signature`. This is an internal implementation detail required to
-        make the hyperlinks work without placing undue effort on the users.
+        Parameters
+        ----------
+        docnames
+            The names of the documents read by the other process.
+        otherdata
+            The domain data of the other process.
+        """
+        self._partners = None
+        self._signature_index = None
+
+        for docname in docnames:
+            try:
+                owned = otherdata['documents'][docname]
+            except KeyError:
+                continue
+
+            self.data['documents'][docname] = owned
+            if docname in otherdata['previews']:
+                self.data['previews'][docname] = otherdata['previews'][docname]
+
+            for signature in owned['targets']:
+                entries = [
+                    entry for entry in otherdata['targets'][signature] if entry[1] == docname
+                ]
+                _add_target_entries(self.data['targets'].setdefault(signature, []), entries)
+
+            for store in ('mutual_refs', 'loose_refs'):
+                for signature in owned[store]:
+                    count = otherdata[store][signature][docname]
+                    self.data[store].setdefault(signature, {})[docname] = count
+
+    def _note_owner(self,
+                    store: str,
+                    signature: str,
+                    docname: str,
+                    lineno: int | None = None) -> dict[str, Any]:
+        """
+        Records that `docname` registered an entry with `signature` into `store`.
 
         Parameters
         ----------
+        store
+            The key of the domain data to which an entry was added, e.g. 'targets'.
         signature
-            The signature of the node - the code/label used to identify the target for the reference
+            The signature of the added entry.
+        docname
+            The name of the document in which the entry was found.
+        lineno
+            The line of the entry, recorded for the first mutual reference or reference with the
+            `signature` in the document, see `first_line`. The lines of the targets are stored with
+            the targets themselves.
 
         Returns
         -------
-        id
-            The unique ID for the node.
+        owned
+            The ownership record of the document, which also records the types of the `mutual_ref`
+            and `backlink` nodes present in the document under 'nodes'.
         """
-        id = f'{self.env.docname}-{signature}-id{self.env.new_serialno(signature)}'
-
-        data = (signature, self.env.docname, id)
-
         try:
-            self.data['mutual_refs'][signature].append(data)
+            owned = self.data['documents'][docname]
         except KeyError:
-            self.data['mutual_refs'][signature] = [data]
+            owned = self.data['documents'][docname] = {
+                'targets': set(), 'mutual_refs': set(), 'loose_refs': set(), 'nodes': set(),
+                'lines': {'mutual_refs': {}, 'loose_refs': {}},
+            }
 
-        return id
+        owned[store].add(signature)
+        if lineno is not None and store in owned['lines']:
+            owned['lines'][store].setdefault(signature, lineno)
 
-    def add_reference_target(self, signature: str, code: str) -> None:
-        """
-        Adds a target reference (`Target`) to the domain.
+        return owned
 
-        Saves the signature of the node, the type of the target, and the document in which the node
-        is found, to the domain data.
+    def first_line(self, store: str, signature: str, docname: str) -> int | None:
+        """
+        Returns the line of the first entry with `signature` in `store` registered from `docname`.
 
         Parameters
         ----------
+        store
+            Either 'mutual_refs' or 'loose_refs'.
         signature
-            The signature of the node - the code/label used to identify the target for the reference
-        code
-            The name of the type of target, e.g. 'target' or 'backlink'.
-        """
-        self.data['targets'].append((signature, code, self.env.docname))
+            The signature of the entry.
+        docname
+            The name of the document.
 
-    def add_loose_reference(self, from_doc: str, target_signature: str) -> None:
+        Returns
+        -------
+        lineno
+            The line, or None if it is not known.
         """
-        Adds a `RegisteredXRefRole` to the domain.
+        try:
+            return self.data['documents'][docname]['lines'][store].get(signature)
+        except KeyError:
+            return None
 
-        Saves the document in which the node is found and a unique ID to the domain data.
+    def has_nodes(self, docname: str, any_role: bool = False) -> bool:
+        """
+        Returns whether the `docname` document contains any `mutual_ref` or `backlink` nodes.
 
         Parameters
         ----------
-        from_doc
-            The name of the document in which the node is found.
-        target_signature
-            The signature of the target that the reference points to.
+        docname
+            The name of the document.
+        any_role
+            If True, whether the document contains the nodes of any ``:iref:`` role instead, i.e.
+            whether any role was registered from it.
+
+        Returns
+        -------
+        has_nodes
+            True if any of the nodes was registered from the document while reading it.
         """
-        id = f'{target_signature}-ref{self.env.new_serialno()}'
         try:
-            self.data['loose_refs'][target_signature].append((from_doc, id, False))
+            owned = self.data['documents'][docname]
         except KeyError:
-            self.data['loose_refs'][target_signature] = [(from_doc, id, False)]
+            return False
 
+        return any_role or bool(owned['nodes'])
 
-def process_mutual_reference_nodes(app: Sphinx, doctree: document, fromdocname: str) -> None:
-    """
-    Processes all mutual reference nodes.
+    def count_roles(self, docname: str) -> dict[str, int]:
+        """
+        Counts the roles of each type registered from the `docname` document.
 
-    Iterates over all `mutual_ref` nodes in the document and edits them so that they link to their
-    corresponding paired nodes.
+        Parameters
+        ----------
+        docname
+            The name of the document.
 
-    Parameters
-    ----------
-    app
-        Sphinx app.
-    doctree
-        The document tree.
-    fromdocname
+        Returns
+        -------
+        counts
+            The number of roles of each type, keyed by the name of the role, e.g. 'ref'.
+        """
+        counts = {'ref': 0, 'target': 0, 'backlink': 0, 'mref': 0}
+
+        try:
+            owned = self.data['documents'][docname]
+        except KeyError:
+            return counts
+
+        for signature in owned['targets']:
+            for code, target_doc, _, _ in self.data['targets'][signature]:
+                if target_doc == docname:
+                    counts['backlink' if code == BACKLINK else 'target'] += 1
+
+        for signature in owned['loose_refs']:
+            counts['ref'] += self.data['loose_refs'][signature][docname]
+
+        for signature in owned['mutual_refs']:
+            counts['mref'] += self.data['mutual_refs'][signature][docname]
+
+        return counts
+
+    def resolve_xref(self,
+                     env: BuildEnvironment,
+                     fromdocname: str,
+                     builder: Builder,
+                     typ: str,
+                     target: str,
+                     node: pending_xref,
+                     contnode: nodes.Element) -> id_reference | inline_reference | None:
+        """
+        Resolves a pending xref node.
+
+        Creates a new node that will replace the pending xref `node`. This is done by matching the
+        pending xref `node` to the appropriate ``target`` registered with the domain.
+
+        Parameters
+        ----------
+        env
+            The build environment.
+        fromdocname
+            The name of the document in which `node` is found.
+        builder
+            The sphinx builder being used.
+        typ
+            The name of the pending xref node.
+        target
+            The code/label used to identify the target of the pending xref `node`.
+        node
+            The pending xref node.
+        contnode
+            The node containing the contents of the pending xref `node`.
+
+        Returns
+        -------
+        reference_node
+            The reference node with the target set. None is returned when a match cannot be found.
+        """
+        if self.stats is None:
+            return self._resolve_xref(fromdocname, builder, target, node, contnode)
+
+        start = perf_counter()
+        reference_node = self._resolve_xref(fromdocname, builder, target, node, contnode)
+        self.stats.record_xref(fromdocname, reference_node is not None, perf_counter() - start)
+
+        return reference_node
+
+    def resolve_any_xref(self,
+                         env: BuildEnvironment,
+                         fromdocname: str,
+                         builder: Builder,
+                         target: str,
+                         node: pending_xref,
+                         contnode: nodes.Element) -> list[tuple[str, nodes.Element]]:
+        """
+        Resolves a pending xref node created by the ``:any:`` role.
+
+        The reference is resolved like ``:iref:ref:``, see `resolve_xref`, but since it is not
+        registered with the domain, it is not listed among the backreferences of a backlink.
+
+        Parameters
+        ----------
+        env
+            The build environment.
+        fromdocname
+            The name of the document in which `node` is found.
+        builder
+            The sphinx builder being used.
+        target
+            The code/label used to identify the target of the pending xref `node`.
+        node
+            The pending xref node.
+        contnode
+            The node containing the contents of the pending xref `node`.
+
+        Returns
+        -------
+        matches
+            The name of the role and the reference node, if the target exists.
+        """
+        target = self.qualify_signature(target, node.get('iref:namespace', ''))
+        if target not in self.data['targets']:
+            return []
+
+        reference_node = self._resolve_xref(fromdocname, builder, target, node, contnode)
+        return [('iref:ref', reference_node)]
+
+    def get_objects(self) -> Iterator[tuple[str, str, str, str, str, int]]:
+        """
+        Returns the ``:iref:target:`` and ``:iref:backlink:`` targets, for the inventory
+        (``objects.inv``) and the search index.
+
+        Only the target that references link to is returned for each signature, see
+        `add_reference_target`.
+
+        Yields
+        ------
+        object
+            The signature, title, type, document name, anchor and search priority of each target.
+        """
+        compact = self.env.config.inline_reference_compact_ids
+
+        for signature, entries in self.data['targets'].items():
+            code, docname, _, title = entries[-1]
+            anchor = compact_id(signature) if compact else signature
+            yield signature, title or signature, TARGET_TYPES[code], docname, anchor, 1
+
+    def _resolve_xref(self,
+                      fromdocname: str,
+                      builder: Builder,
+                      target: str,
+                      node: pending_xref,
+                      contnode: nodes.Element) -> id_reference | inline_reference | None:
+        """Resolves a pending xref node. See `resolve_xref` for the parameters."""
+        try:
+            match_type, todocname, _, _ = self.data['targets'][target][-1]
+        except KeyError:
+            # Reported once for all the references to the target by `check_consistency`, or by
+            # `report_missing_summary` at the end of the build
+            if self.missing is not None:
+                self.missing.setdefault(target, Counter())[fromdocname] += 1
+            return None
+
+        signature = target
+
+        # Backlinks require the id param in order to be able to be linked back to
+        if match_type == BACKLINK:
+            reference_node = make_refnode(builder, fromdocname, todocname, signature, contnode, signature, id_reference)
+
+            # The position of the reference was stored on the node when it was read, so the ID does
+            # not depend on the order of resolution and resolving does not change any state
+            serialno = node.get('iref_serialno')
+            if serialno is None:
+                return reference_node
+
+            id = reference_id(fromdocname, signature, serialno)
+            try:
+                reference_node['ids'].append(id)
+            except KeyError:
+                reference_node['ids'] = [id]
+        else:
+            reference_node = make_refnode(builder, fromdocname, todocname, signature, contnode, signature, inline_reference)
+
+        if signature in self.data['previews'].get(todocname, ()) and builder.format == 'html':
+            reference_node['classes'].append(f'iref-preview-{compact_id(todocname)}')
+
+        return reference_node
+
+    def add_mutual_reference(self, signature: str, lineno: int | None = None) -> str:
+        """
+        Adds a mutual reference (`MutualReference`) to the domain and generates a unique ID for the
+        node.
+
+        Counts the node under its original signature and the name of the document in which the node
+        was found, in the domain data for mutual references. The unique ID is derived from these
+        and the position of the node among the mutual references with the same `signature` in the
+        document, see `mutual_reference_id`.
+
+        The unique ID can be used do distinguish between the two `mutual_ref` nodes, since they are
+        created using the same `signature`. This is an internal implementation detail required to
+        make the hyperlinks work without placing undue effort on the users.
+
+        Parameters
+        ----------
+        signature
+            The signature of the node - the code/label used to identify the target for the reference
+        lineno
+            The line in which the node is found, reported by `check_consistency`.
+
+        Returns
+        -------
+        id
+            The unique ID for the node.
+        """
+        signature, docname = sys.intern(signature), sys.intern(self.env.docname)
+
+        counts = self.data['mutual_refs'].setdefault(signature, {})
+        serialno = counts.get(docname, 0)
+        counts[docname] = serialno + 1
+
+        self._note_owner('mutual_refs', signature, docname, lineno)['nodes'].add('mutual_ref')
+        self._partners = None
+
+        return mutual_reference_id(docname, signature, serialno)
+
+    def mutual_partner(self, anchor: str) -> tuple[str, str, str] | None:
+        """
+        Returns the mutual reference that the mutual reference with the unique ID `anchor` links to.
+
+        The mutual references with the same signature form a group in which each member links to
+        the next one, and the last to the first, so a pair of mutual references links to each other.
+        The members are ordered by document and by position in the document, so that incremental
+        builds match clean builds. The partners of all mutual references are computed at once on
+        the first call after the mutual references change, so each call is a dict lookup.
+
+        Parameters
+        ----------
+        anchor
+            The unique ID of the mutual reference, see `mutual_reference_id`.
+
+        Returns
+        -------
+        partner
+            The name of the document containing the mutual reference, and the name of the document
+            containing the partner and the unique ID of the partner. None if the mutual reference is
+            the only one with its signature.
+        """
+        if self._partners is None:
+            self._partners = {}
+            for signature, counts in self.data['mutual_refs'].items():
+                members = [
+                    (docname, mutual_reference_id(docname, signature, serialno))
+                    for docname in sorted(counts)
+                    for serialno in range(counts[docname])
+                ]
+                if len(members) < 2:
+                    continue
+
+                for (docname, member), partner in zip(members, members[1:] + members[:1]):
+                    self._partners[member] = (docname, *partner)
+
+        return self._partners.get(anchor)
+
+    def qualify_signature(self, signature: str, namespace: str | None = None) -> str:
+        """
+        Returns the `signature` of a role qualified with its namespace, if namespaces are enabled in
+        the configuration.
+
+        A signature of the form ``ns:sig`` is already qualified, while one starting with ``:`` is
+        explicitly in the global namespace and is returned without the ``:``. Any other signature
+        is in the default namespace of the document set by the ``iref:namespace`` directive, or in
+        the global namespace if none was set. All the domain data is keyed by the qualified
+        signatures, so a lookup of a signature only matches targets in the same namespace.
+
+        Parameters
+        ----------
+        signature
+            The signature as written in the role.
+        namespace
+            The default namespace, by default that of the document being read.
+
+        Returns
+        -------
+        signature
+            The qualified signature.
+        """
+        if not self.env.config.inline_reference_namespaces:
+            return signature
+
+        if signature.startswith(':'):
+            return signature[1:]
+
+        if ':' in signature:
+            return signature
+
+        if namespace is None:
+            namespace = self.env.ref_context.get('iref:namespace')
+
+        return f'{namespace}:{signature}' if namespace else signature
+
+    def namespace_of(self, signature: str) -> str:
+        """
+        Returns the namespace of a qualified `signature`, or an empty string for the global
+        namespace, see `qualify_signature`.
+
+        Parameters
+        ----------
+        signature
+            The qualified signature.
+
+        Returns
+        -------
+        namespace
+            The namespace.
+        """
+        if not self.env.config.inline_reference_namespaces:
+            return ''
+
+        return signature.partition(':')[0] if ':' in signature else ''
+
+    def suggest_targets(self, signature: str) -> list[str]:
+        """
+        Returns the signatures of the registered targets most similar to the `signature` of a
+        missing target.
+
+        The signatures are looked up in a `SignatureIndex` of the targets in the same namespace as
+        `signature`. The indices of all namespaces are built on the first call after the targets
+        change.
+
+        Parameters
+        ----------
+        signature
+            The signature of the missing target.
+
+        Returns
+        -------
+        signatures
+            Up to three similar signatures, most similar first.
+        """
+        if self._signature_index is None:
+            namespaces: dict[str, list[str]] = {}
+            for target in self.data['targets']:
+                namespaces.setdefault(self.namespace_of(target), []).append(target)
+
+            self._signature_index = {
+                namespace: SignatureIndex(targets) for namespace, targets in namespaces.items()
+            }
+
+        try:
+            return self._signature_index[self.namespace_of(signature)].suggest(signature)
+        except KeyError:
+            return []
+
+    def term_matcher(self) -> TermMatcher:
+        """
+        Returns the matcher of the terms of the ``inline_reference_terms`` configuration value,
+        used by `TermLinkTransform`.
+
+        The matcher is built the first time it is needed, and then shared by all documents read in
+        this process.
+        """
+        if self._term_matcher is None:
+            self._term_matcher = TermMatcher(self.env.config.inline_reference_terms)
+
+        return self._term_matcher
+
+    def add_reference_target(self,
+                             signature: str,
+                             code: str,
+                             lineno: int | None = None,
+                             title: str = '') -> None:
+        """
+        Adds a target reference (`Target`) to the domain.
+
+        Saves the type of the target, the document and line in which the node is found, and the
+        title of the target, under the signature of the node in the domain data. If several targets
+        share a signature, references link to the last one, by the name of its document and then
+        its position in it, regardless of the order in which the documents are read.
+
+        Parameters
+        ----------
+        signature
+            The signature of the node - the code/label used to identify the target for the reference
+        code
+            The name of the type of target, e.g. 'looseref' or 'backlink'.
+        lineno
+            The line on which the node is found, used for reporting duplicate targets.
+        title
+            The text of the target, used as its name in the inventory, see `get_objects`.
+        """
+        self.add_reference_targets([(signature, lineno, title)], code)
+
+    def add_reference_targets(self,
+                              targets: Iterable[tuple[str, int | None, str]],
+                              code: str) -> None:
+        """
+        Adds many targets of the same type, found in the same document, to the domain at once.
+
+        Equivalent to calling `add_reference_target` for each target, but only looks up the
+        document's ownership record once.
+
+        Parameters
+        ----------
+        targets
+            The signature, line and title of each target, see `add_reference_target`.
+        code
+            The name of the type of the targets, e.g. 'looseref' or 'backlink'.
+        """
+        docname = sys.intern(self.env.docname)
+        code = TARGET_CODES[code]
+        store = self.data['targets']
+        owned = None
+
+        for signature, lineno, title in targets:
+            signature = sys.intern(signature)
+
+            try:
+                _add_target_entries(store[signature], [(code, docname, lineno, title)])
+            except KeyError:
+                store[signature] = [(code, docname, lineno, title)]
+
+            if owned is None:
+                owned = self._note_owner('targets', signature, docname)
+            else:
+                owned['targets'].add(signature)
+
+        if owned is None:
+            return
+
+        self._signature_index = None
+        if code == BACKLINK:
+            owned['nodes'].add('backlink')
+
+    def add_loose_reference(self,
+                            from_doc: str,
+                            target_signature: str,
+                            lineno: int | None = None) -> int:
+        """
+        Adds a `RegisteredXRefRole` to the domain.
+
+        Counts the reference under the signature of the target and the document in which the node
+        is found. The unique ID of the reference is derived from these and the position of the
+        reference among the references to `target_signature` in the document, see `reference_id`.
+
+        Parameters
+        ----------
+        from_doc
+            The name of the document in which the node is found.
+        target_signature
+            The signature of the target that the reference points to.
+        lineno
+            The line in which the node is found, reported by `check_consistency`.
+
+        Returns
+        -------
+        serialno
+            The position of the reference among the references to `target_signature` in the
+            document.
+        """
+        target_signature, from_doc = sys.intern(target_signature), sys.intern(from_doc)
+
+        counts = self.data['loose_refs'].setdefault(target_signature, {})
+        serialno = counts.get(from_doc, 0)
+        counts[from_doc] = serialno + 1
+
+        self._note_owner('loose_refs', target_signature, from_doc, lineno)
+
+        return serialno
+
+
+def _add_target_entries(entries: list[tuple[int, str, int | None, str]],
+                        new: list[tuple[int, str, int | None, str]]) -> None:
+    """
+    Adds the `new` entries of a target, all from the same document, to its existing `entries`.
+
+    The entries are kept in the order of their documents, and of their position within each
+    document, so that the last one, to which the references link, is the same whichever order the
+    documents are read or merged in, see `InlineReferenceDomain.merge_domaindata`.
+    """
+    entries.extend(new)
+    if len(entries) > len(new) and entries[-len(new) - 1][1] > new[0][1]:
+        # Stable, so the entries of each document stay in the order of their position
+        entries.sort(key=lambda entry: entry[1])
+
+
+def reference_id(docname: str, signature: str, serialno: int) -> str:
+    """
+    Returns the unique ID of a reference (``:iref:ref:``) to a backlink.
+
+    Parameters
+    ----------
+    docname
+        The name of the document in which the reference is found.
+    signature
+        The signature of the target of the reference.
+    serialno
+        The position of the reference among the references to `signature` in the document.
+
+    Returns
+    -------
+    id
+        The unique ID.
+    """
+    return f'{docname}-{signature}-ref{serialno}'
+
+
+def mutual_reference_id(docname: str, signature: str, serialno: int) -> str:
+    """
+    Returns the unique ID of a mutual reference (``:iref:mref:``).
+
+    Parameters
+    ----------
+    docname
+        The name of the document in which the mutual reference is found.
+    signature
+        The signature of the mutual reference.
+    serialno
+        The position of the node among the mutual references with `signature` in the document.
+
+    Returns
+    -------
+    id
+        The unique ID.
+    """
+    return f'{docname}-{signature}-id{serialno}'
+
+
+def compact_id(id: str) -> str:
+    """
+    Returns a short label that stands in for the `id` when compact IDs are enabled.
+
+    The label is derived from a hash of the `id`, so it is the same in every build and in every
+    document, and contains only lowercase letters and digits so that it needs no escaping.
+
+    Parameters
+    ----------
+    id
+        The ID.
+
+    Returns
+    -------
+    label
+        The compact label.
+    """
+    digest = blake2b(id.encode('utf-8'), digest_size=8).digest()
+    return 'i' + b32encode(digest).decode('ascii').rstrip('=').lower()
+
+
+def timed_handler(handler: Callable[[Sphinx, document, str], None]
+                  ) -> Callable[[Sphinx, document, str], None]:
+    """
+    Decorates a ``doctree-resolved`` handler to record the time spent in each call to it.
+
+    The whole call is timed, including any traversal of the tree, and recorded under the name of
+    the handler in the `BuildStats` of the domain, when they are collected.
+
+    Parameters
+    ----------
+    handler
+        The ``doctree-resolved`` handler.
+
+    Returns
+    -------
+    timed
+        The handler, timed.
+    """
+    @wraps(handler)
+    def timed(app: Sphinx, doctree: document, fromdocname: str) -> None:
+        stats = app.builder.env.get_domain('iref').stats
+        if stats is None:
+            handler(app, doctree, fromdocname)
+            return
+
+        start = perf_counter()
+        try:
+            handler(app, doctree, fromdocname)
+        finally:
+            stats.record_handler(handler.__name__, fromdocname, perf_counter() - start)
+
+    return timed
+
+
+@timed_handler
+def process_iref_nodes(app: Sphinx, doctree: document, fromdocname: str) -> None:
+    """
+    Processes all mutual reference and backlink nodes.
+
+    Finds all `mutual_ref` and `backlink` nodes in a single traversal of the document and passes
+    each to `process_mutual_reference_node` or `process_backlink_node` respectively. Documents in
+    which no such nodes were registered while reading are skipped without traversing them. Trees
+    assembled from several documents (e.g. by the LaTeX builder), which their builders mark with
+    the ``docname`` attribute, are always traversed.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    doctree
+        The document tree.
+    fromdocname
         The name of the document calling this function.
     """
     domain: InlineReferenceDomain = app.builder.env.get_domain('iref')
 
-    for node in doctree.findall(mutual_ref):
-        anchor = node['ids'].pop(0)
+    if 'docname' not in doctree and not domain.has_nodes(fromdocname):
+        return
 
-        mutual_nodes = domain.data['mutual_refs'][anchor]
+    for node in doctree.findall(_is_processed_node):
+        if isinstance(node, mutual_ref):
+            process_mutual_reference_node(app, domain, node)
+        else:
+            process_backlink_node(app, domain, node, fromdocname)
 
-        if len(mutual_nodes) > 2:
-            LOGGER.warning(f'inline_reference: mutual reference "{anchor}" has more than two uses. '
-                           f'This could be because it was used more than twice, or because of '
-                           f'issues across multiple files.')
-        elif len(mutual_nodes) < 2:
-            LOGGER.warning(f'inline_reference: mutual reference "{anchor}" does not have a pair')
-            continue
 
-        if mutual_nodes[0][2] == node['ids'][0]:
-            this_node, other_node = 0, 1
-        elif mutual_nodes[1][2] == node['ids'][0]:
-            this_node, other_node = 1, 0
-        else:
-            LOGGER.warning(f'inline_reference: mutual reference "{anchor}" is not mutually '
-                           f'matching up: both {mutual_nodes[0][2]} and {mutual_nodes[0][2]} != '
-                           f'{node["ids"][0]}')
+def _is_processed_node(node: nodes.Node) -> bool:
+    """Returns whether `node` is processed by `process_iref_nodes`."""
+    return isinstance(node, (mutual_ref, backlink))
+
+
+def process_mutual_reference_node(app: Sphinx,
+                                  domain: InlineReferenceDomain,
+                                  node: mutual_ref) -> None:
+    """
+    Processes a mutual reference node.
+
+    Edits the `mutual_ref` node so that it links to the next node in its group, see
+    `InlineReferenceDomain.mutual_partner`.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    domain
+        The iref domain.
+    node
+        The mutual reference node.
+    """
+    # The signature is only needed to register the node; the unique ID remains
+    node['ids'].pop(0)
+
+    partner = domain.mutual_partner(node['ids'][0])
+
+    # Mutual references without a pair are reported once by `check_consistency`
+    if partner is None:
+        return
+
+    from_doc, to_doc, node['refid'] = partner
+
+    if from_doc != to_doc:
+        node['refuri'] = get_relative_uri(app.builder, from_doc, to_doc) + '#' + node['refid']
+
+
+def process_backlink_node(app: Sphinx,
+                          domain: InlineReferenceDomain,
+                          node: backlink,
+                          fromdocname: str) -> None:
+    """
+    Processes a backlink node.
+
+    Edits the `backlink` node so that it contains the backreferences to all nodes that link to it.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    domain
+        The iref domain.
+    node
+        The backlink node.
+    fromdocname
+        The name of the document calling this function.
+    """
+    try:
+        backlinks = domain.data['loose_refs'][node['ids'][0]]
+    except KeyError:
+        # This backlink has no :iref:ref: pointing to it.
+        return
+
+    if domain.stats is not None:
+        domain.stats.record_backlink(node['ids'][0], sum(backlinks.values()))
+
+    # Re-read documents are added at the end, so the documents are sorted to match a clean build
+    for to_doc in sorted(backlinks):
+        uri = get_relative_uri(app.builder, fromdocname, to_doc) + '#'
+
+        for serialno in range(backlinks[to_doc]):
+            node.add_backref(uri + reference_id(to_doc, node['ids'][0], serialno))
+
+    limit = app.config.inline_reference_backlink_limit
+    if limit and len(node['backrefs']) > limit:
+        if app.builder.name in ('html', 'dirhtml'):
+            if BACKREFS_PAGE in app.env.found_docs:
+                # Reported by `collect_backrefs_page`, which does not replace the document
+                return
+
+            uri = get_relative_uri(app.builder, fromdocname, BACKREFS_PAGE)
+            node['backrefs_page'] = uri + '#' + node['ids'][0]
+        elif app.builder.format == 'latex':
+            node['backrefs_page'] = backrefs_anchor(node['ids'][0])
+
+
+def collect_backrefs_page(app: Sphinx) -> Iterator[tuple[str, dict[str, Any], str]]:
+    """
+    Generates the HTML page listing all references to each backlink with more references than the
+    ``inline_reference_backlink_limit`` configuration value.
+
+    The page is created in a single pass over the ``loose_refs`` data of the domain, with a section
+    for each such backlink, which the ellipsis after its truncated backrefs links to. If the project
+    has a document with the name of the page, the page is not generated and a warning is logged
+    instead.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+
+    Yields
+    ------
+    page
+        The name, the context and the template of the page, if any backlink is truncated.
+    """
+    limit = app.config.inline_reference_backlink_limit
+    if not limit or app.builder.name not in ('html', 'dirhtml'):
+        return
+
+    env = app.builder.env
+    if BACKREFS_PAGE in env.found_docs:
+        LOGGER.warning(f'inline_reference: the document "{BACKREFS_PAGE}" has the name of the page '
+                       f'listing the references to backlinks, so the page is not generated and the '
+                       f'truncated backreferences are not linked to it', location=BACKREFS_PAGE,
+                       type='iref', subtype='backrefs')
+        return
+
+    domain: InlineReferenceDomain = env.get_domain('iref')
+    make_id = compact_id if app.config.inline_reference_compact_ids else str
+
+    sections = []
+    for signature in sorted(domain.data['loose_refs']):
+        backlinks = domain.data['loose_refs'][signature]
+        owners = [docname for code, docname, _, _ in domain.data['targets'].get(signature, ())
+                  if code == BACKLINK]
+        if not owners or sum(backlinks.values()) <= limit:
             continue
 
-        from_doc, to_doc = mutual_nodes[this_node][1], mutual_nodes[other_node][1]
-        node['refid'] = mutual_nodes[other_node][2]
+        target_uri = get_relative_uri(app.builder, BACKREFS_PAGE, owners[-1])
+        items = []
+        for docname in sorted(backlinks):
+            uri = get_relative_uri(app.builder, BACKREFS_PAGE, docname) + '#'
+            links = ', '.join(
+                f'<a href="{escape(uri + make_id(reference_id(docname, signature, serialno)))}">'
+                f'{serialno}</a>'
+                for serialno in range(backlinks[docname])
+            )
+            title = escape(env.titles[docname].astext()) if docname in env.titles else docname
+            items.append(f'<li>{title}: {links}</li>')
+
+        sections.append(
+            f'<section id="{escape(signature)}">\n'
+            f'<h2><a href="{escape(target_uri + "#" + make_id(signature))}">'
+            f'{escape(signature)}</a></h2>\n'
+            f'<ul>\n' + '\n'.join(items) + '\n</ul>\n</section>'
+        )
+
+    if sections:
+        body = '<h1>Referenced from</h1>\n' + '\n'.join(sections)
+        yield BACKREFS_PAGE, {'title': 'Referenced from', 'body': body}, 'page.html'
+
+
+@timed_handler
+def append_backrefs_appendix(app: Sphinx, doctree: document, fromdocname: str) -> None:
+    """
+    Appends an appendix listing all references to each truncated backlink to a LaTeX document.
+
+    The LaTeX counterpart of `collect_backrefs_page`: the appendix has a section for each backlink
+    in the document with more references than the ``inline_reference_backlink_limit``
+    configuration value, which the ellipsis after its truncated backrefs links to, and which lists
+    the references grouped by document. Runs after `compact_iref_ids`, so the links are made with
+    the final IDs.
 
-        if from_doc != to_doc:
-            node['refuri'] = app.builder.get_relative_uri(from_doc, to_doc)
-            node['refuri'] += '#' + mutual_nodes[other_node][2]
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    doctree
+        The tree assembled from all the documents of the LaTeX document.
+    fromdocname
+        The name of the root document of the LaTeX document.
+    """
+    limit = app.config.inline_reference_backlink_limit
+    if not limit or app.builder.format != 'latex' or 'docname' not in doctree:
+        return
+
+    anchors = {node['backrefs_page'] for node in doctree.findall(backlink)
+               if 'backrefs_page' in node}
+    if not anchors:
+        return
+
+    env = app.builder.env
+    domain: InlineReferenceDomain = env.get_domain('iref')
+    make_id = compact_id if app.config.inline_reference_compact_ids else str
+
+    appendix = new_document('<iref-backrefs>', doctree.settings)
+    appendix['docname'] = BACKREFS_PAGE
+    chapter = nodes.section(ids=[BACKREFS_PAGE])
+    chapter += nodes.title('Referenced from', 'Referenced from')
+    appendix += chapter
+
+    for signature in sorted(domain.data['loose_refs']):
+        if backrefs_anchor(signature) not in anchors:
+            continue
 
+        backlinks = domain.data['loose_refs'][signature]
+        section = nodes.section()
+        section += nodes.title(signature, signature)
+
+        # The anchor is kept out of the title, which LaTeX also uses for the PDF bookmarks
+        intro = nodes.paragraph()
+        intro += reference_target('', 'References to ', ids=[backrefs_anchor(signature)])
+        intro += inline_reference(signature, signature, refid=make_id(signature))
+        intro += nodes.Text(':')
+        section += intro
+
+        items = nodes.bullet_list()
+        for docname in sorted(backlinks):
+            name = env.titles[docname].astext() if docname in env.titles else docname
+            paragraph = nodes.paragraph('', name + ': ')
+            for serialno in range(backlinks[docname]):
+                if serialno:
+                    paragraph += nodes.Text(', ')
+                paragraph += inline_reference(
+                    str(serialno), str(serialno),
+                    refid=make_id(reference_id(docname, signature, serialno))
+                )
+            items += nodes.list_item('', paragraph)
+
+        section += items
+        chapter += section
+
+    doctree += appendix
+
+
+def backrefs_anchor(signature: str) -> str:
+    """
+    Returns the ID of the section listing all references to the backlink with `signature` in the
+    LaTeX appendix, see `append_backrefs_appendix`.
+    """
+    return f'{BACKREFS_PAGE}-{signature}'
 
-def process_backlink_nodes(app: Sphinx, doctree: document, fromdocname: str) -> None:
+
+@timed_handler
+def compact_iref_ids(app: Sphinx, doctree: document, fromdocname: str) -> None:
     """
-    Processes all backlink nodes.
+    Replaces the IDs of all ``:iref:`` nodes with their `compact_id` labels.
 
-    Iterates over all `backlink` nodes in the document and edits them so that they contain the
-    backreferences to all nodes that link to them.
+    Only done for the HTML and LaTeX builders, when enabled in the configuration. Runs after
+    `process_iref_nodes`, which needs the original IDs to look up the nodes in the domain, and
+    rewrites the ``ids``, ``refid``, the fragment of the ``refuri`` and the ``backrefs`` alike, so
+    that the links still match their targets. Like in `process_iref_nodes`, documents from which no
+    ``:iref:`` roles were registered are skipped without traversing them, except for trees assembled
+    from several documents.
 
     Parameters
     ----------
@@ -722,24 +2096,398 @@ def process_backlink_nodes(app: Sphinx, doctree: document, fromdocname: str) ->
     fromdocname
         The name of the document calling this function.
     """
+    if not app.config.inline_reference_compact_ids or app.builder.format not in ('html', 'latex'):
+        return
+
     domain: InlineReferenceDomain = app.builder.env.get_domain('iref')
+    if 'docname' not in doctree and not domain.has_nodes(fromdocname, any_role=True):
+        return
 
-    for node in doctree.findall(backlink):
-        try:
-            backlinks = domain.data['loose_refs'][node['ids'][0]]
-        except KeyError:
-            # This backlink has no :iref:ref: pointing to it.
-            continue
+    for node in doctree.findall(_is_iref_node):
+        node['ids'] = [compact_id(id) for id in node['ids']]
+
+        if 'refid' in node:
+            node['refid'] = compact_id(node['refid'])
+
+        if 'refuri' in node and '#' in node['refuri']:
+            uri, id = node['refuri'].rsplit('#', 1)
+            node['refuri'] = uri + '#' + compact_id(id)
+
+        if node.get('backrefs'):
+            node['backrefs'] = [uri + '#' + compact_id(id)
+                                for uri, id in (ref.rsplit('#', 1) for ref in node['backrefs'])]
+
+
+def _is_iref_node(node: nodes.Node) -> bool:
+    """Returns whether `node` is one of the nodes created for the ``:iref:`` roles."""
+    return isinstance(node, (inline_reference, id_reference, reference_target, mutual_ref,
+                             backlink))
+
+
+def note_docs_to_read(app: Sphinx, env: BuildEnvironment, docnames: list[str]) -> None:
+    """
+    Remembers which documents are read in this build, for `get_affected_documents` and the build
+    statistics (see `collect_read_stats`).
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    env
+        The build environment.
+    docnames
+        The names of the documents that will be read.
+    """
+    domain: InlineReferenceDomain = env.get_domain('iref')
+    domain.read_docnames = list(docnames)
+
+
+def get_affected_documents(app: Sphinx, env: BuildEnvironment) -> set[str]:
+    """
+    Returns the documents that have to be written again because of the documents read in this build.
+
+    These are the documents that were not changed themselves, but whose links or backreferences
+    depend on the ``:iref:`` roles in the changed documents. They are written again without being
+    read again, since only the resolution of their references changes.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    env
+        The build environment.
+
+    Returns
+    -------
+    docnames
+        The names of the documents to write.
+    """
+    domain: InlineReferenceDomain = env.get_domain('iref')
+    return domain.find_affected_documents()
+
+
+def check_consistency(app: Sphinx, env: BuildEnvironment) -> None:
+    """
+    Reports the problems with the ``:iref:`` roles in the whole project.
+
+    Goes over the domain data once and reports each of the following problems once, with the
+    locations of the roles involved:
+
+    * ``:iref:target:`` and ``:iref:backlink:`` that share an ID
+    * ``:iref:mref:`` IDs that are used only once
+    * ``:iref:ref:`` whose ID does not match any ``:iref:target:`` or ``:iref:backlink:``, with
+      the most similar IDs that do, unless these are reported at the end of the build instead (see
+      `report_missing_summary`)
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    env
+        The build environment.
+    """
+    domain: InlineReferenceDomain = env.get_domain('iref')
+    targets = domain.data['targets']
+
+    for signature, entries in targets.items():
+        if len(entries) > 1:
+            _, docname, lineno, _ = entries[-1]
+            others = ', '.join(_format_location(doc, line) for _, doc, line, _ in entries[:-1])
+            LOGGER.warning(f'inline_reference: duplicate target "{signature}", also defined at '
+                           f'{others}; references link to this one',
+                           location=(docname, lineno), type='iref', subtype='duplicate')
+
+    for signature, counts in domain.data['mutual_refs'].items():
+        if sum(counts.values()) < 2:
+            docname = next(iter(counts))
+            LOGGER.warning(f'inline_reference: mutual reference "{signature}" does not have a pair',
+                           location=(docname, domain.first_line('mutual_refs', signature, docname)),
+                           type='iref', subtype='mref')
+
+    if domain.missing is not None:
+        return
+
+    for signature, counts in domain.data['loose_refs'].items():
+        if signature not in targets:
+            locations = [(docname, domain.first_line('loose_refs', signature, docname))
+                         for docname in sorted(counts)]
+            documents = ', '.join(f'{_format_location(docname, lineno)} ({counts[docname]})'
+                                  for docname, lineno in locations)
+            suggestions = format_suggestions(domain.suggest_targets(signature))
+            LOGGER.warning(f'inline_reference: Reference "{signature}" not found, referenced from '
+                           f'{documents}{suggestions}', location=locations[0], type='iref',
+                           subtype='ref')
+
+
+def _format_location(docname: str, lineno: int | None) -> str:
+    """Formats the location of a role for a warning message."""
+    return docname if lineno is None else f'{docname}:{lineno}'
+
+
+def init_missing_summary(app: Sphinx) -> None:
+    """
+    Starts collecting the references to missing targets, if enabled in the configuration.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    """
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+    domain.missing = {} if app.config.inline_reference_missing_summary else None
+
+
+def report_missing_summary(app: Sphinx, exception: Exception | None) -> None:
+    """
+    Reports all the references to missing targets resolved in this build in a single warning.
+
+    The warning lists each missing target with the number of references to it, the documents
+    containing them and the most similar existing targets, starting with the most referenced
+    target.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    exception
+        The exception that stopped the build, if any.
+    """
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+
+    if not domain.missing or exception is not None:
+        return
+
+    totals = {signature: sum(counts.values()) for signature, counts in domain.missing.items()}
+    lines = []
+    for signature in sorted(totals, key=lambda signature: (-totals[signature], signature)):
+        documents = ', '.join(f'{docname} ({count})'
+                              for docname, count in sorted(domain.missing[signature].items()))
+        suggestions = format_suggestions(domain.suggest_targets(signature))
+        lines.append(f'    "{signature}": {totals[signature]} from {documents}{suggestions}')
+
+    LOGGER.warning(f'inline_reference: {sum(totals.values())} references to {len(totals)} missing '
+                   f'targets:\n' + '\n'.join(lines), type='iref', subtype='ref')
+
+
+def init_static_files(app: Sphinx) -> None:
+    """
+    Adds the stylesheet and, if previews are enabled, the script of this package to the HTML output.
+
+    The stylesheet is not added if the ``inline_reference_inline_style`` configuration value is set,
+    in which case the style is written into each tag instead.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    """
+    if app.builder.format != 'html':
+        return
+
+    static_files = False
+    if not app.config.inline_reference_inline_style:
+        app.add_css_file('inline_reference.css')
+        static_files = True
+
+    if app.config.inline_reference_previews:
+        app.add_js_file('inline_reference_previews.js', defer='defer')
+        static_files = True
+
+    if static_files:
+        app.config.html_static_path.append(path.join(path.dirname(__file__), '_static'))
+
+
+def collect_previews(app: Sphinx, doctree: document) -> None:
+    """
+    Stores the snippet of text around each ``:iref:target:`` and ``:iref:backlink:`` in the
+    document just read, if previews are enabled in the configuration.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    doctree
+        The document tree.
+    """
+    if not app.config.inline_reference_previews:
+        return
+
+    # The targets in `LiteralTargetsDirective` blocks come with their line as the snippet
+    snippets = {
+        node['ids'][0]: node.get('iref_preview') or extract_snippet(node)
+        for node in doctree.findall(_is_target_node) if node['ids']
+    }
+
+    if snippets:
+        domain: InlineReferenceDomain = app.env.get_domain('iref')
+        domain.data['previews'][sys.intern(app.env.docname)] = snippets
+
+
+def _is_target_node(node: nodes.Node) -> bool:
+    """Returns whether `node` is created by ``:iref:target:`` or ``:iref:backlink:``."""
+    return isinstance(node, (reference_target, backlink))
+
+
+def write_preview_files(app: Sphinx, exception: Exception | None) -> None:
+    """
+    Writes the snippets collected by `collect_previews` into the static files of the HTML output,
+    one file per document, if previews are enabled in the configuration. The files of documents
+    that were removed, or no longer have any targets, are deleted.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    exception
+        The exception that stopped the build, if any.
+    """
+    if exception is not None or not app.config.inline_reference_previews or \
+            app.builder.format != 'html':
+        return
+
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+    anchor = compact_id if app.config.inline_reference_compact_ids else str
+    written, removed = write_previews(app.outdir, domain.data['previews'], compact_id, anchor)
+
+    LOGGER.verbose(f'inline_reference: wrote the previews of {written} documents and removed '
+                   f'{removed} stale files')
+
+
+def init_uri_cache(app: Sphinx) -> None:
+    """
+    Creates a new, empty, relative URI cache for the build, sized according to the configuration.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    """
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+    domain.uri_cache = RelativeURICache(app.config.inline_reference_uri_cache_size)
+
+
+def report_uri_cache(app: Sphinx, exception: Exception | None) -> None:
+    """
+    Reports the hit and miss counts of the relative URI cache at the end of the build.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    exception
+        The exception that stopped the build, if any.
+    """
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+    LOGGER.verbose(f'inline_reference: relative URI cache: {domain.uri_cache.hits} hits, '
+                   f'{domain.uri_cache.misses} misses')
+
+
+def init_stats(app: Sphinx) -> None:
+    """
+    Starts collecting the build statistics, if enabled in the configuration.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    """
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+    domain.stats = BuildStats() if app.config.inline_reference_stats else None
+
+
+def collect_read_stats(app: Sphinx, env: BuildEnvironment) -> None:
+    """
+    Records the roles in the documents read in this build into the build statistics.
+
+    The roles are counted from the domain data once reading is finished, rather than when they are
+    parsed, so that the roles parsed in parallel reader processes are included.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    env
+        The build environment.
+    """
+    domain: InlineReferenceDomain = env.get_domain('iref')
+
+    if domain.stats is not None:
+        domain.stats.record_read(domain.count_roles(docname) for docname in domain.read_docnames)
+
+
+def write_stats(app: Sphinx, exception: Exception | None) -> None:
+    """
+    Prints a summary of the build statistics and writes them as JSON into the output directory.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    exception
+        The exception that stopped the build, if any.
+    """
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+
+    if domain.stats is None or exception is not None:
+        return
+
+    targets = sum(len(entries) for entries in domain.data['targets'].values())
+    report = domain.stats.report(targets)
+
+    LOGGER.info('inline_reference statistics:')
+    for line in format_report(report):
+        LOGGER.info(f'    {line}')
+
+    with open(path.join(app.outdir, 'inline_reference_stats.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def write_iref_index(app: Sphinx, exception: Exception | None) -> None:
+    """
+    Writes the SQLite index of the domain data into the output directory, if enabled in the
+    configuration.
+
+    Only the rows of the documents read again or removed since the index was last written are
+    written, found by comparing the versions of the documents in the environment with those in the
+    index, see `inline_reference.index`. If the index is disabled, an index left by a previous
+    build is removed, since it would not be updated.
+
+    Parameters
+    ----------
+    app
+        Sphinx app.
+    exception
+        The exception that stopped the build, if any.
+    """
+    if exception is not None:
+        return
+
+    filename = path.join(app.outdir, 'inline_reference.sqlite')
+    if not app.config.inline_reference_index:
+        if path.exists(filename):
+            os.remove(filename)
+        return
 
-        for to_doc, ref_id, _ in backlinks:
-            backref = app.builder.get_relative_uri(fromdocname, to_doc) + '#' + ref_id
+    domain: InlineReferenceDomain = app.env.get_domain('iref')
+    versions = {docname: app.env.all_docs.get(docname) for docname in domain.data['documents']}
+    written = write_index(filename, domain.data, versions, TARGET_TYPES)
 
-            node.add_backref(backref)
+    LOGGER.verbose(f'inline_reference: wrote the index of {written} documents to {filename}')
 
 
 def setup(app: Sphinx) -> ExtensionMetadata:
     """Plugs the extension into Sphinx."""
     app.add_domain(InlineReferenceDomain)
+    app.add_config_value('inline_reference_uri_cache_size', 4096, '', [int])
+    app.add_config_value('inline_reference_stats', False, '', [bool])
+    app.add_config_value('inline_reference_missing_summary', False, '', [bool])
+    app.add_config_value('inline_reference_compact_ids', False, 'env', [bool])
+    app.add_config_value('inline_reference_inline_style', False, 'html', [bool])
+    app.add_config_value('inline_reference_backlink_limit', 0, 'html', [int])
+    app.add_config_value('inline_reference_index', False, '', [bool])
+    app.add_config_value('inline_reference_namespaces', False, 'env', [bool])
+    app.add_config_value('inline_reference_previews', False, 'env', [bool])
+    app.add_config_value('inline_reference_terms', {}, 'env', [dict])
 
     app.add_node(inline_reference,
                  html=(visit_reference_node_default, depart_reference_node_default),
@@ -762,11 +2510,29 @@ def setup(app: Sphinx) -> ExtensionMetadata:
                  text=(visit_reference_node_default, depart_reference_node_default),
                  latex=(visit_backlink_node_latex, depart_backlink_node_latex))
 
-    app.connect('doctree-resolved', process_mutual_reference_nodes)
-    app.connect('doctree-resolved', process_backlink_nodes)
+    app.add_transform(TermLinkTransform)
+
+    app.connect('builder-inited', init_static_files)
+    app.connect('builder-inited', init_uri_cache)
+    app.connect('builder-inited', init_stats)
+    app.connect('builder-inited', init_missing_summary)
+    app.connect('doctree-read', collect_previews)
+    app.connect('env-before-read-docs', note_docs_to_read)
+    app.connect('env-updated', collect_read_stats)
+    app.connect('env-get-updated', get_affected_documents)
+    app.connect('env-check-consistency', check_consistency)
+    app.connect('doctree-resolved', process_iref_nodes)
+    app.connect('doctree-resolved', compact_iref_ids)
+    app.connect('doctree-resolved', append_backrefs_appendix)
+    app.connect('html-collect-pages', collect_backrefs_page)
+    app.connect('build-finished', report_uri_cache)
+    app.connect('build-finished', write_stats)
+    app.connect('build-finished', report_missing_summary)
+    app.connect('build-finished', write_iref_index)
+    app.connect('build-finished', write_preview_files)
 
     return {
         'version': '0.1',
-        'parallel_read_safe': False,
+        'parallel_read_safe': True,
         'parallel_write_safe': True,
     }
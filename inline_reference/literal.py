@@ -0,0 +1,84 @@
+"""
+Finding the targets of ``iref:literal`` blocks.
+
+Shared by `LiteralTargetsDirective`, which creates the targets while the documents are read, and by
+the standalone checker (`inline_reference.check`), which has to know the IDs of the targets to
+check the references to them.
+"""
+from __future__ import annotations
+
+import re
+
+
+def find_spans(lines: list[str],
+               pattern: str | None = None,
+               entries: str = '') -> dict[int, list[tuple[int, int, str]]]:
+    """
+    Finds the parts of the `lines` of a block to turn into targets.
+
+    Parameters
+    ----------
+    lines
+        The lines of the block.
+    pattern
+        The ``:pattern:`` option: a regular expression, each match of which (or of its first group,
+        if it has any) in each line is a target with the matched text as its ID.
+    entries
+        The ``:lines:`` option: comma-separated pairs of the number of a line (counted from 1) and
+        the ID of the target made of the whole line.
+
+    Returns
+    -------
+    spans
+        The start and end of each target, and its ID, for each line with targets (counted from
+        0), in order.
+
+    Raises
+    ------
+    ValueError
+        If the `pattern` is invalid, an entry does not name a line of the block, or two targets
+        overlap.
+    """
+    spans: dict[int, list[tuple[int, int, str]]] = {}
+
+    if pattern is not None:
+        try:
+            compiled = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f'Invalid pattern "{pattern}": {e}') from None
+
+        group = 1 if compiled.groups else 0
+        for lineno, line in enumerate(lines):
+            for match in compiled.finditer(line):
+                if match.group(group):
+                    spans.setdefault(lineno, []).append(
+                        (match.start(group), match.end(group), match.group(group))
+                    )
+
+    for entry in entries.split(','):
+        if not entry.strip():
+            continue
+
+        try:
+            number, signature = entry.split()
+            lineno = int(number) - 1
+        except ValueError:
+            lineno = -1
+
+        if not 0 <= lineno < len(lines):
+            raise ValueError(f'Invalid entry "{entry.strip()}" in :lines:, expected the number of '
+                             f'a line in the block (1 to {len(lines)}) and an ID')
+
+        line = lines[lineno]
+        start = len(line) - len(line.lstrip())
+        spans.setdefault(lineno, []).append((start, len(line.rstrip()), signature))
+
+    for lineno, line_spans in spans.items():
+        line_spans.sort()
+
+        for previous, span in zip(line_spans, line_spans[1:]):
+            if span[0] < previous[1]:
+                raise ValueError(f'Targets "{previous[2]}" and "{span[2]}" overlap in line '
+                                 f'{lineno + 1} of the block')
+
+    return spans
@@ -0,0 +1,132 @@
+"""
+Opt-in hover previews of the targets of ``:iref:ref:`` links in the HTML output.
+
+When the ``inline_reference_previews`` configuration value is set, the sentence around each
+``:iref:target:`` and ``:iref:backlink:`` is extracted when its document is read (`extract_snippet`)
+and stored in the domain data. At the end of the build, the snippets are written into the static
+files of the HTML output, as one small JSON file per document (`write_previews`). The links to the
+targets are given a ``iref-preview-<chunk>`` class naming the file of the target's document, from
+which ``inline_reference_previews.js`` fetches the snippet the first time the link is hovered over.
+This way, the size of the pages does not grow with the number of links.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections.abc import Callable, Mapping
+from os import path
+
+from docutils import nodes
+
+
+# The directory of the JSON files in the output directory
+PREVIEWS_DIR = path.join('_static', 'iref-previews')
+
+
+def extract_snippet(node: nodes.Element, limit: int = 200) -> str:
+    """
+    Returns the sentence containing the `node`, shortened to about `limit` characters.
+
+    Parameters
+    ----------
+    node
+        The target node.
+    limit
+        The maximum length of the snippet, not including the ellipses marking where it was cut.
+
+    Returns
+    -------
+    snippet
+        The text of the sentence.
+    """
+    block = node.parent
+    while block is not None and not isinstance(block, nodes.TextElement):
+        block = block.parent
+
+    if block is None:
+        return ' '.join(node.astext().split())
+
+    # The position of the node within the text of the paragraph, with all whitespace collapsed
+    before = []
+    for text in block.findall(nodes.Text):
+        if _is_descendant(text, node):
+            break
+        before.append(text.astext())
+
+    start = len(re.sub(r'\s+', ' ', ''.join(before)).lstrip())
+    text = re.sub(r'\s+', ' ', block.astext()).strip()
+
+    sentence_start = text.rfind('. ', 0, start)
+    sentence_start = 0 if sentence_start == -1 else sentence_start + 2
+    sentence_end = text.find('. ', start)
+    sentence_end = len(text) if sentence_end == -1 else sentence_end + 1
+    snippet = text[sentence_start:sentence_end]
+
+    if len(snippet) <= limit:
+        return snippet
+
+    # Keep the part of the sentence around the node
+    offset = min(max(start - sentence_start - limit // 2, 0), len(snippet) - limit)
+    cut = snippet[offset:offset + limit]
+    return ('…' if offset > 0 else '') + cut + ('…' if offset + limit < len(snippet) else '')
+
+
+def _is_descendant(text: nodes.Text, node: nodes.Element) -> bool:
+    """Returns whether the `text` is inside the `node`."""
+    parent = text.parent
+    while parent is not None:
+        if parent is node:
+            return True
+        parent = parent.parent
+
+    return False
+
+
+def write_previews(outdir: str,
+                   previews: Mapping[str, Mapping[str, str]],
+                   chunk_name: Callable[[str], str],
+                   anchor: Callable[[str], str]) -> tuple[int, int]:
+    """
+    Writes the snippets of each document into a JSON file in the static files of the output.
+
+    Each file maps the anchors of the targets in the document to their snippets, so that the script
+    can look up the snippet from the fragment of a link. The files left in the directory by earlier
+    builds for documents that are not in `previews` any more are deleted.
+
+    Parameters
+    ----------
+    outdir
+        The output directory.
+    previews
+        The snippets of the targets, by document and signature.
+    chunk_name
+        Returns the name of the file of a document, without the extension.
+    anchor
+        Returns the anchor of a target from its signature.
+
+    Returns
+    -------
+    written
+        The number of files written.
+    removed
+        The number of stale files deleted.
+    """
+    directory = path.join(outdir, PREVIEWS_DIR)
+    os.makedirs(directory, exist_ok=True)
+
+    filenames = set()
+    for docname, snippets in previews.items():
+        filename = chunk_name(docname) + '.json'
+        filenames.add(filename)
+
+        chunk = {anchor(signature): snippet for signature, snippet in snippets.items()}
+        with open(path.join(directory, filename), 'w', encoding='utf-8') as f:
+            json.dump(chunk, f, ensure_ascii=False, separators=(',', ':'))
+
+    stale = [filename for filename in os.listdir(directory)
+             if filename.endswith('.json') and filename not in filenames]
+    for filename in stale:
+        os.remove(path.join(directory, filename))
+
+    return len(previews), len(stale)
@@ -0,0 +1,176 @@
+"""
+Opt-in instrumentation of the ``inline_reference`` build pipeline.
+
+When the ``inline_reference_stats`` configuration value is set, the `InlineReferenceDomain` keeps a
+`BuildStats` object for the duration of the build, which collects counters and timings of the
+reading and resolving of the ``:iref:`` roles. At the end of the build, a summary is printed and the
+full report is written as JSON into the output directory.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+
+class BuildStats:
+    """
+    Counters and timings of the ``inline_reference`` pipeline collected during a single build.
+
+    Attributes
+    ----------
+    roles
+        The number of roles of each type (e.g. 'ref') parsed in the documents read in this build.
+    documents_read
+        The number of documents read in this build.
+    resolved
+        The number of references resolved by `InlineReferenceDomain.resolve_xref`.
+    missed
+        The number of references that `InlineReferenceDomain.resolve_xref` could not resolve.
+    times
+        The total time, in seconds, spent in ``resolve_xref`` and in each ``doctree-resolved``
+        handler, including its traversal of the document.
+    document_times
+        The time, in seconds, spent in all of the above for each document.
+    longest_backlink
+        The signature of the backlink with the most references to it, and the number of references.
+    """
+    def __init__(self) -> None:
+        self.roles: Counter[str] = Counter()
+        self.documents_read = 0
+        self.resolved = 0
+        self.missed = 0
+        self.times: defaultdict[str, float] = defaultdict(float)
+        self.document_times: defaultdict[str, float] = defaultdict(float)
+        self.longest_backlink: tuple[str, int] = ('', 0)
+
+    def record_read(self, role_counts: Iterable[Mapping[str, int]]) -> None:
+        """
+        Records the documents read in this build.
+
+        Parameters
+        ----------
+        role_counts
+            The number of roles of each type, for each document read.
+        """
+        for counts in role_counts:
+            self.documents_read += 1
+            self.roles.update(counts)
+
+    def record_xref(self, docname: str, resolved: bool, elapsed: float) -> None:
+        """
+        Records a call to ``resolve_xref``.
+
+        Parameters
+        ----------
+        docname
+            The name of the document containing the reference.
+        resolved
+            Whether the reference was resolved.
+        elapsed
+            The time spent in the call, in seconds.
+        """
+        if resolved:
+            self.resolved += 1
+        else:
+            self.missed += 1
+
+        self.times['resolve_xref'] += elapsed
+        self.document_times[docname] += elapsed
+
+    def record_handler(self, handler: str, docname: str, elapsed: float) -> None:
+        """
+        Records a call to a ``doctree-resolved`` handler.
+
+        Parameters
+        ----------
+        handler
+            The name of the handler.
+        docname
+            The name of the document being processed.
+        elapsed
+            The time spent in the call, in seconds.
+        """
+        self.times[handler] += elapsed
+        self.document_times[docname] += elapsed
+
+    def record_backlink(self, signature: str, references: int) -> None:
+        """
+        Records the processing of a backlink.
+
+        Parameters
+        ----------
+        signature
+            The signature of the backlink.
+        references
+            The number of references to the backlink.
+        """
+        if references > self.longest_backlink[1]:
+            self.longest_backlink = (signature, references)
+
+    def report(self, targets_registered: int, worst: int = 10) -> dict[str, Any]:
+        """
+        Returns the collected statistics as a JSON-serialisable dict.
+
+        Parameters
+        ----------
+        targets_registered
+            The total number of targets registered with the domain.
+        worst
+            The number of documents with the most time spent to list.
+
+        Returns
+        -------
+        report
+            The statistics.
+        """
+        documents = sorted(self.document_times.items(), key=lambda item: item[1], reverse=True)
+
+        return {
+            'documents_read': self.documents_read,
+            'roles': dict(self.roles),
+            'targets_registered': targets_registered,
+            'xrefs': {'resolved': self.resolved, 'missed': self.missed},
+            'longest_backlink': {
+                'signature': self.longest_backlink[0],
+                'references': self.longest_backlink[1],
+            },
+            'times': dict(self.times),
+            'worst_documents': [
+                {'docname': docname, 'time': time} for docname, time in documents[:worst]
+            ],
+        }
+
+
+def format_report(report: Mapping[str, Any]) -> list[str]:
+    """
+    Formats the `report` created by `BuildStats.report` as a short human-readable summary.
+
+    Parameters
+    ----------
+    report
+        The statistics.
+
+    Returns
+    -------
+    lines
+        The lines of the summary.
+    """
+    roles = ', '.join(f'{count} {role}' for role, count in sorted(report['roles'].items()))
+    times = ', '.join(f'{name} {time:.3f}s' for name, time in report['times'].items())
+    longest = report['longest_backlink']
+
+    lines = [
+        f'read {report["documents_read"]} documents: {roles or "no roles"}',
+        f'{report["targets_registered"]} targets registered',
+        f'{report["xrefs"]["resolved"]} references resolved, {report["xrefs"]["missed"]} missed',
+        f'most referenced backlink: "{longest["signature"]}" ({longest["references"]} references)',
+        f'time: {times or "none"}',
+    ]
+
+    if report['worst_documents']:
+        worst = ', '.join(f'{document["docname"]} ({document["time"]:.3f}s)'
+                          for document in report['worst_documents'])
+        lines.append(f'slowest documents: {worst}')
+
+    return lines
@@ -0,0 +1,113 @@
+"""
+Approximate matching of target signatures, used to suggest the intended target of a reference to a
+missing one.
+
+`SignatureIndex` is an inverted index from the trigrams of the signatures to the signatures that
+contain them. Looking up a signature only visits the signatures sharing at least one trigram with
+it, rather than comparing it to every registered signature.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+
+
+class SignatureIndex:
+    """
+    Trigram index of target signatures.
+
+    Parameters
+    ----------
+    signatures
+        The signatures to index.
+    max_postings
+        Trigrams shared by more signatures than this (e.g. a common prefix) are not used for the
+        look up, so that it stays fast for large projects.
+    """
+    def __init__(self, signatures: Iterable[str], max_postings: int = 1000) -> None:
+        self.max_postings = max_postings
+        self._grams: dict[str, int] = {}
+        self._postings: dict[str, list[str]] = {}
+
+        for signature in signatures:
+            grams = trigrams(signature)
+            self._grams[signature] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(signature)
+
+    def suggest(self, signature: str, n: int = 3, cutoff: float = 0.5) -> list[str]:
+        """
+        Returns the indexed signatures most similar to `signature`.
+
+        The similarity is the Dice coefficient of the sets of trigrams of the two signatures.
+
+        Parameters
+        ----------
+        signature
+            The signature to find similar signatures to.
+        n
+            The maximum number of signatures to return.
+        cutoff
+            The minimum similarity, between 0 and 1, of the signatures returned.
+
+        Returns
+        -------
+        signatures
+            The most similar signatures, most similar first.
+        """
+        grams = trigrams(signature)
+        shared: Counter[str] = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram, ())
+            if len(postings) <= self.max_postings:
+                shared.update(postings)
+
+        scores = [
+            (2 * count / (len(grams) + self._grams[candidate]), candidate)
+            for candidate, count in shared.items()
+            if candidate != signature
+        ]
+        scores.sort(key=lambda score: (-score[0], score[1]))
+
+        return [candidate for score, candidate in scores[:n] if score >= cutoff]
+
+
+def trigrams(signature: str) -> set[str]:
+    """
+    Returns the trigrams of `signature`, ignoring case.
+
+    The signature is padded so that its first and last characters also appear in several
+    trigrams.
+
+    Parameters
+    ----------
+    signature
+        The signature.
+
+    Returns
+    -------
+    trigrams
+        The set of trigrams.
+    """
+    padded = f'  {signature.lower()} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def format_suggestions(suggestions: list[str]) -> str:
+    """
+    Formats the `suggestions` for a warning message.
+
+    Parameters
+    ----------
+    suggestions
+        The suggested signatures.
+
+    Returns
+    -------
+    text
+        The text to append to the warning, or an empty string if there are no suggestions.
+    """
+    if not suggestions:
+        return ''
+
+    return '; did you mean ' + ', '.join(f'"{suggestion}"' for suggestion in suggestions) + '?'
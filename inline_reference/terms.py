@@ -0,0 +1,109 @@
+"""
+Matching of many terms in text at once, used to link the terms of ``inline_reference_terms`` to
+their targets.
+
+`TermMatcher` is an Aho-Corasick automaton: a trie of the terms, in which each state also points to
+the state of the longest proper suffix of its text that is in the trie. Scanning a text visits each
+of its characters once, whatever the number of terms, instead of running one search per term.
+"""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable
+
+
+class TermMatcher:
+    """
+    Automaton finding all occurrences of a set of terms in a text.
+
+    Parameters
+    ----------
+    terms
+        The terms to find. Matching is case-sensitive.
+    """
+    def __init__(self, terms: Iterable[str]) -> None:
+        # The transitions of each state, and the lengths of the terms ending at each state
+        self._goto: list[dict[str, int]] = [{}]
+        self._output: list[tuple[int, ...]] = [()]
+
+        for term in terms:
+            if not term:
+                continue
+
+            state = 0
+            for char in term:
+                try:
+                    state = self._goto[state][char]
+                except KeyError:
+                    self._goto.append({})
+                    self._output.append(())
+                    self._goto[state][char] = state = len(self._goto) - 1
+
+            if len(term) not in self._output[state]:
+                self._output[state] += (len(term),)
+
+        # Breadth-first, so that the fallback of each state is computed before those of its children
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+
+                fallback = self._fail[state]
+                while char not in self._goto[fallback] and fallback:
+                    fallback = self._fail[fallback]
+
+                fallback = self._goto[fallback].get(char, 0)
+                self._fail[child] = fallback if fallback != child else 0
+                self._output[child] += self._output[self._fail[child]]
+
+    def find(self, text: str) -> list[tuple[int, int]]:
+        """
+        Finds the terms in `text`.
+
+        Only whole words are matched, i.e. terms that are not directly preceded or followed by a
+        letter, digit or underscore. Where matches overlap, the one starting first, and then the
+        longest, is kept.
+
+        Parameters
+        ----------
+        text
+            The text to search.
+
+        Returns
+        -------
+        matches
+            The start and end of each match, in order.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+
+        candidates = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            while char not in goto[state] and state:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for length in output[state]:
+                start = end - length
+                if _is_boundary(text, start) and _is_boundary(text, end):
+                    candidates.append((start, -length))
+
+        matches = []
+        position = 0
+        for start, length in sorted(candidates):
+            if start >= position:
+                position = start - length
+                matches.append((start, position))
+
+        return matches
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    """Returns whether `index` is at the start or end of a word in `text`."""
+    if index == 0 or index == len(text):
+        return True
+
+    before, after = text[index - 1], text[index]
+    return not ((before.isalnum() or before == '_') and (after.isalnum() or after == '_'))
@@ -0,0 +1,69 @@
+from inline_reference.__main__ import main
+
+
+def test_check(tmp_path, capsys):
+    (tmp_path / 'a.rst').write_text(
+        'A\n=\n\n'
+        ':iref:target:`target<id1>` and :iref:ref:`fine<id1>`, :iref:ref:`missing\n'
+        'one<missing-id>` and :iref:mref:`orphan<mref-orphan>`.\n'
+        'Without a title, :iref:ref:`id1` and :iref:ref:`plain`, but not :iref:ref:`!disabled`.\n'
+    )
+    (tmp_path / 'b.rst').write_text(
+        'B\n=\n\n'
+        ':iref:backlink:`again<id1>`, :iref:mref:`pair<mref-pair>` :iref:mref:`pair<mref-pair>`\n'
+    )
+    (tmp_path / 'c.txt').write_text(':iref:ref:`ignored<ignored-id>`\n')
+
+    assert main(['check', '--jobs', '2', str(tmp_path)]) == 1
+
+    a, b = tmp_path / 'a.rst', tmp_path / 'b.rst'
+    assert capsys.readouterr().out.splitlines() == [
+        f'{b}:4: duplicate target "id1", also defined at {a}:4',
+        f'{a}:5: mutual reference "mref-orphan" does not have a pair',
+        f'{a}:4: reference "missing-id" not found',
+        f'{a}:6: reference "plain" not found',
+    ]
+
+    (tmp_path / 'a.rst').unlink()
+    assert main(['check', '-j', '1', str(tmp_path / 'b.rst')]) == 0
+
+
+def test_check_namespaces(tmp_path, capsys):
+    for namespace in ('a', 'b'):
+        (tmp_path / f'{namespace}.rst').write_text(
+            f'.. iref:namespace:: {namespace}\n\n'
+            f':iref:target:`target<x>` and :iref:ref:`other<b:x>` and :iref:ref:`typo<y>`\n'
+        )
+
+    assert main(['check', '-j', '1', '--namespaces', str(tmp_path)]) == 1
+
+    a, b = tmp_path / 'a.rst', tmp_path / 'b.rst'
+    assert capsys.readouterr().out.splitlines() == [
+        f'{a}:3: reference "a:y" not found',
+        f'{b}:3: reference "b:y" not found',
+    ]
+
+
+def test_check_literal(tmp_path, capsys):
+    (tmp_path / 'conf.py').write_text('')
+    (tmp_path / 'listing.conf').write_text('host = localhost\n')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'a.rst').write_text(
+        '.. iref:namespace:: ns\n\n'
+        '.. iref:literal::\n    :pattern: ^(\\w+) =\n    :lines: 1 section\n    :prefix: conf-\n\n'
+        '    [server]\n    port = 80\n\n'
+        '.. iref:literal::\n    :file: /listing.conf\n    :pattern: ^(\\w+) =\n\n'
+        ':iref:ref:`s<conf-section>`, :iref:ref:`p<conf-port>`, :iref:ref:`h<host>` and\n'
+        ':iref:ref:`m<conf-missing>`.\n'
+    )
+
+    a = tmp_path / 'sub' / 'a.rst'
+    assert main(['check', '-j', '1', '--namespaces', str(tmp_path)]) == 1
+    assert capsys.readouterr().out.splitlines() == [f'{a}:16: reference "ns:conf-missing" not found']
+
+    # The targets are placed on their lines, so duplicates are reported there
+    a.write_text(a.read_text() + '\n:iref:target:`again<conf-port>`\n')
+    assert main(['check', '-j', '1', str(tmp_path)]) == 1
+    assert capsys.readouterr().out.splitlines()[0] == (
+        f'{a}:18: duplicate target "conf-port", also defined at {a}:9'
+    )
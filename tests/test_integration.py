@@ -1,10 +1,16 @@
 import glob
+import json
 import os.path
+import posixpath
 import re
+import sqlite3
 from pathlib import Path
 import pytest
 
 from sphinx.testing.path import path
+from sphinx.util.inventory import InventoryFile
+
+from inline_reference.inline_reference import compact_id
 
 pytest_plugins = ('sphinx.testing.fixtures',)
 
@@ -95,6 +101,8 @@ def test_integration_html(app, status):
     assert result == expected
     assert result_crosspage == expected_crosspage
 
+    assert (Path(app.outdir) / '_static' / 'inline_reference.css').exists()
+
 
 @pytest.mark.sphinx("text", testroot="integration")
 def test_integration_text(app, status):
@@ -128,3 +136,488 @@ def test_integration_latex(app, status):
     assert expected
 
     assert result == expected
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-incremental")
+def test_incremental_html(app, status, warning, make_app):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    # Force both documents to be re-read, which re-registers all of their iref data
+    for docname in ('test', 'test_crosspage'):
+        os.utime(Path(app.srcdir) / f'{docname}.rst')
+
+    rebuilt = make_app('html', srcdir=app.srcdir, freshenv=False, status=status, warning=warning)
+    rebuilt.build()
+
+    assert 'more than two uses' not in warning.getvalue()
+
+    domain = rebuilt.env.get_domain('iref')
+    assert sum(domain.data['mutual_refs']['mid99'].values()) == 2
+    assert sum(domain.data['loose_refs']['bid4'].values()) == 6
+
+    root_dir = path(__file__).parent.abspath()
+    start = '<section id="title-16505646556160">'
+    result = clean_up((Path(app.srcdir) / "_build/html/test.html").read_text())
+    expected = clean_up((root_dir / 'roots' / 'test-integration' / "expected.html").read_text())
+
+    assert remove_edges_html(result, start) == remove_edges_html(expected, start)
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-duplicates")
+def test_incremental_duplicates_html(app, warning, make_app):
+    srcdir = Path(app.srcdir)
+    for docname in ('dup_a', 'dup_b'):
+        (srcdir / f'{docname}.rst').write_text(
+            f':orphan:\n\n{docname}\n======\n\nThe :iref:target:`target<dup>` and a '
+            f':iref:ref:`reference<dup>`.\n'
+        )
+
+    outputs = []
+    for freshenv in (True, False):
+        build_app = make_app('html', srcdir=app.srcdir, freshenv=freshenv, warning=warning)
+        build_app.build()
+        outputs.append((Path(build_app.outdir) / 'dup_a.html').read_text())
+
+        # Re-reading the first document must not make its target the one that is linked to
+        os.utime(srcdir / 'dup_a.rst')
+
+    assert 'href="dup_b.html#dup"' in outputs[0]
+    assert outputs[0] == outputs[1]
+    assert warning.getvalue().count('duplicate target "dup", also defined at dup_a:6;') == 2
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-affected")
+def test_affected_documents_html(app, status, warning, make_app):
+    app.build()
+    outdir = Path(app.outdir)
+    assert 'test_crosspage-bid4-ref0' in (outdir / 'test.html').read_text()
+
+    # Only test_crosspage is changed and re-read, but test contains the backlink it referred to
+    crosspage = Path(app.srcdir) / 'test_crosspage.rst'
+    crosspage.write_text(crosspage.read_text().replace('* :iref:ref:`bid4<bid4>`\n', ''))
+
+    rebuilt = make_app('html', srcdir=app.srcdir, freshenv=False, status=status, warning=warning)
+    rebuilt.build()
+
+    assert 'test_crosspage-bid4-ref0' not in (outdir / 'test.html').read_text()
+    test_mtime = (outdir / 'test.html').stat().st_mtime_ns
+
+    # A change that does not touch any iref roles does not affect test
+    crosspage.write_text(crosspage.read_text().replace('Testing:', 'Testing again:'))
+
+    rebuilt = make_app('html', srcdir=app.srcdir, freshenv=False, status=status, warning=warning)
+    rebuilt.build()
+
+    assert 'Testing again:' in (outdir / 'test_crosspage.html').read_text()
+    assert (outdir / 'test.html').stat().st_mtime_ns == test_mtime
+
+
+PARALLEL_DOCUMENT = """Parallel {i}
+==========
+
+Target :iref:target:`t{i}<pt{i}>`, reference to the :iref:ref:`next target<pt{next}>`, a
+:iref:ref:`backlink<pb>` reference and the :iref:mref:`mutual link<pm{i}>` back to the
+:iref:mref:`previous document<pm{previous}>`.
+"""
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-parallel")
+def test_parallel_read_html(app, status, warning, make_app):
+    srcdir = Path(app.srcdir)
+
+    # Sphinx only reads in parallel when there are more than 5 documents to read
+    n_docs = 12
+    for i in range(n_docs):
+        text = PARALLEL_DOCUMENT.format(i=i, next=(i + 1) % n_docs, previous=(i - 1) % n_docs)
+        if i == 0:
+            text += '\nThe :iref:backlink:`backlink<pb>`.\n'
+        # A target defined in every document, which must link to the same one in both builds
+        text += '\nThe :iref:target:`duplicate<pdup>` and a :iref:ref:`reference<pdup>`.\n'
+        (srcdir / f'parallel{i}.rst').write_text(text)
+
+    outputs = []
+    for parallel in (0, 4):
+        build_app = make_app('html', srcdir=app.srcdir, freshenv=True, parallel=parallel,
+                             status=status, warning=warning)
+        build_app.build()
+
+        outdir = Path(build_app.outdir)
+        outputs.append({page.name: page.read_text() for page in outdir.glob('*.html')})
+
+        # Whichever order the documents are read and merged in
+        entries = build_app.env.get_domain('iref').data['targets']['pdup']
+        assert [entry[1] for entry in entries] == sorted(f'parallel{i}' for i in range(n_docs))
+
+    serial, parallel = outputs
+
+    assert 'parallel0.html' in serial
+    last = max(f'parallel{i}' for i in range(n_docs))
+    assert f'href="{last}.html#pdup"' in serial['parallel0.html']
+    assert serial == parallel
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-uri-cache",
+                    confoverrides={'inline_reference_uri_cache_size': 1})
+def test_uri_cache(app, status):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    cache = app.env.get_domain('iref').uri_cache
+    assert cache.maxsize == 1
+    assert len(cache._cache) == 1
+    assert cache.hits > 0
+    assert cache.misses > 1
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-stats",
+                    confoverrides={'inline_reference_stats': True})
+def test_stats(app, status):
+    app.build()
+    assert "inline_reference statistics" in status.getvalue()
+
+    report = json.loads((Path(app.outdir) / 'inline_reference_stats.json').read_text())
+
+    assert report['documents_read'] == 3
+    assert report['roles'] == {'ref': 49, 'target': 12, 'backlink': 7, 'mref': 22}
+    assert report['targets_registered'] == 19
+    assert report['xrefs'] == {'resolved': 49, 'missed': 0}
+    assert report['longest_backlink'] == {'signature': 'bid4', 'references': 6}
+    assert report['worst_documents'][0]['docname'] == 'test'
+    assert set(report['times']) == {'resolve_xref', 'process_iref_nodes', 'compact_iref_ids',
+                                    'append_backrefs_appendix'}
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-consistency")
+def test_consistency_check(app, warning, make_app):
+    (Path(app.srcdir) / 'broken.rst').write_text(
+        'Broken\n======\n\n'
+        'Duplicate :iref:target:`target<id1>`, :iref:ref:`missing<missing-id>` and again\n'
+        ':iref:ref:`missing<missing-id>`, :iref:mref:`orphan<mref-orphan>` and three\n'
+        ':iref:mref:`one<mref-three>`, :iref:mref:`two<mref-three>`, :iref:mref:`three<mref-three>`.\n'
+        'A :iref:ref:`typo<bid44>`.\n'
+    )
+
+    build_app = make_app('html', srcdir=app.srcdir, freshenv=True, warning=warning)
+    build_app.build()
+    warnings = warning.getvalue()
+
+    assert warnings.count('duplicate target "id1"') == 1
+    assert 'also defined at broken:4' in warnings
+    assert warnings.count('Reference "missing-id" not found, referenced from broken:4 (2)') == 1
+    assert ('Reference "bid44" not found, referenced from broken:4 (1); did you mean "bid4", '
+            in warnings)
+    assert warnings.count('mutual reference "mref-orphan" does not have a pair') == 1
+    assert re.search(r'broken\.rst:4: .*mutual reference "mref-orphan"', warnings)
+    assert 'mref-three' not in warnings
+
+    result = (Path(build_app.outdir) / 'broken.html').read_text()
+    for i, j in ((0, 1), (1, 2), (2, 0)):
+        assert f'href="#broken-mref-three-id{j}" id="broken-mref-three-id{i}"' in result
+
+
+@pytest.mark.sphinx("text", testroot="integration", srcdir="integration-missing-summary",
+                    confoverrides={'inline_reference_missing_summary': True})
+def test_missing_summary(app, warning, make_app):
+    (Path(app.srcdir) / 'missing.rst').write_text(
+        'Missing\n=======\n\n'
+        ':iref:ref:`one<missing-1>`, :iref:ref:`one<missing-1>`, :iref:ref:`two<missing-2>`,\n'
+        ':iref:ref:`typo<Id10>`.\n'
+    )
+
+    build_app = make_app('text', srcdir=app.srcdir, freshenv=True, warning=warning,
+                         confoverrides={'inline_reference_missing_summary': True})
+    build_app.build()
+    warnings = warning.getvalue()
+
+    assert 'not found' not in warnings
+    assert warnings.count('4 references to 3 missing targets') == 1
+    assert '"missing-1": 2 from missing (2)\n' in warnings
+    assert '"Id10": 1 from missing (1); did you mean "id10", ' in warnings
+    assert '"missing-2": 1 from missing (1)' in warnings
+
+
+@pytest.mark.sphinx("latex", testroot="integration", srcdir="integration-compact-ids",
+                    confoverrides={'inline_reference_compact_ids': True})
+def test_compact_ids_latex(app, status):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    result = (Path(app.srcdir) / "_build/latex/inline_reference.tex").read_text()
+    links = set(re.findall(r'\\hyperlink\{\\detokenize\{([^}]*)\}\}', result))
+    targets = set(re.findall(r'\\hypertarget\{\\detokenize\{([^}]*)\}\}', result))
+
+    assert 'test-bid2-ref0' not in result
+    assert compact_id('test-bid2-ref0') in links & targets
+    assert links <= targets
+    assert all(re.fullmatch('i[a-z2-7]{13}', id) for id in links | targets)
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-compact-ids-html",
+                    confoverrides={'inline_reference_compact_ids': True})
+def test_compact_ids_html(app, status):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    outdir = Path(app.outdir)
+    result = (outdir / "test.html").read_text()
+    assert 'test-bid2-ref0' not in result
+    assert f'id="{compact_id("test-bid2-ref0")}"' in result
+
+    # Documents without any iref roles are left alone
+    assert 'href="test.html"' in (outdir / "index.html").read_text()
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-backlink-limit",
+                    confoverrides={'inline_reference_backlink_limit': 2})
+def test_backlink_limit_html(app, status):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    outdir = Path(app.outdir)
+    result = (outdir / 'test.html').read_text()
+    assert ('<a href=#test-bid2-ref1><sub>1</sub></a>,'
+            '<a href=iref-backrefs.html#bid2><sub>…</sub></a>') in result
+    assert 'href=#test-bid2-ref2>' not in result
+
+    page = (outdir / 'iref-backrefs.html').read_text()
+    assert '<section id="bid2">' in page
+    assert all(f'href="test.html#test-bid2-ref{i}"' in page for i in range(5))
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-backlink-limit-clash",
+                    confoverrides={'inline_reference_backlink_limit': 2})
+def test_backlink_limit_clash_html(app, warning, make_app):
+    (Path(app.srcdir) / 'iref-backrefs.rst').write_text(':orphan:\n\nMine\n====\n\nMy page.\n')
+
+    build_app = make_app('html', srcdir=app.srcdir, freshenv=True, warning=warning,
+                         confoverrides={'inline_reference_backlink_limit': 2})
+    build_app.build()
+
+    assert warning.getvalue().count('has the name of the page listing the references') == 1
+
+    outdir = Path(build_app.outdir)
+    assert 'My page.' in (outdir / 'iref-backrefs.html').read_text()
+
+    html = (outdir / 'test.html').read_text()
+    assert '<a href=#test-bid2-ref1><sub>1</sub></a>,<sub>…</sub>' in html
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-objects")
+def test_objects_html(app, make_app):
+    (Path(app.srcdir) / 'any.rst').write_text(
+        ':orphan:\n\nAny\n===\n\nLinks to :any:`id10` and :any:`bid4`.\n'
+    )
+
+    build_app = make_app('html', srcdir=app.srcdir, freshenv=True)
+    build_app.build()
+    outdir = Path(build_app.outdir)
+
+    with open(outdir / 'objects.inv', 'rb') as f:
+        inventory = InventoryFile.load(f, '', posixpath.join)
+
+    assert inventory['iref:target']['id10'][2:] == ('test.html#id10', 'Ut')
+    assert inventory['iref:backlink']['bid4'][2:] == ('test.html#bid4', '-')
+
+    result = (outdir / 'any.html').read_text()
+    assert 'href="test.html#id10"' in result
+    assert 'href="test.html#bid4"' in result
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-index",
+                    confoverrides={'inline_reference_index': True})
+def test_index(app, status, warning, make_app):
+    app.build()
+    filename = Path(app.outdir) / 'inline_reference.sqlite'
+
+    def query(sql):
+        with sqlite3.connect(filename) as connection:
+            rows = connection.execute(sql).fetchall()
+        connection.close()
+        return rows
+
+    refs = "SELECT docname, count FROM refs WHERE signature = 'bid4' ORDER BY docname"
+    assert query(refs) == [('test', 5), ('test_crosspage', 1)]
+    assert query("SELECT docname, type, title FROM targets WHERE signature = 'id10'") == \
+        [('test', 'target', 'Ut')]
+    assert query("SELECT SUM(count) FROM mutual_refs WHERE signature = 'mid99'") == [(2,)]
+
+    test_rows = query("SELECT rowid FROM refs WHERE docname = 'test'")
+
+    crosspage = Path(app.srcdir) / 'test_crosspage.rst'
+    original = crosspage.read_text()
+    crosspage.write_text(original.replace('* :iref:ref:`bid4<bid4>`\n', ''))
+
+    rebuilt = make_app('html', srcdir=app.srcdir, freshenv=False, status=status, warning=warning,
+                       confoverrides={'inline_reference_index': True})
+    rebuilt.build()
+
+    assert query(refs) == [('test', 5)]
+    assert query("SELECT rowid FROM refs WHERE docname = 'test'") == test_rows
+
+    # Another builder sharing the doctrees reads the change, so the next HTML build does not
+    crosspage.write_text(original)
+    make_app('text', srcdir=app.srcdir, freshenv=False, status=status, warning=warning).build()
+
+    rebuilt = make_app('html', srcdir=app.srcdir, freshenv=False, status=status, warning=warning,
+                       confoverrides={'inline_reference_index': True})
+    rebuilt.build()
+
+    assert query(refs) == [('test', 5), ('test_crosspage', 1)]
+    assert query("SELECT rowid FROM refs WHERE docname = 'test'") == test_rows
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-namespaces",
+                    confoverrides={'inline_reference_namespaces': True})
+def test_namespaces_html(app, warning, make_app):
+    srcdir = Path(app.srcdir)
+    for namespace, other in (('a', 'b'), ('b', 'a')):
+        (srcdir / f'ns_{namespace}.rst').write_text(
+            f':orphan:\n\n.. iref:namespace:: {namespace}\n\n{namespace.upper()}\n=\n\n'
+            f'The :iref:target:`target<x>`, :iref:ref:`local<x>`, :iref:ref:`other<{other}:x>`, '
+            f':iref:ref:`global<:id10>` and :iref:ref:`typo<xx>`.\n'
+        )
+
+    build_app = make_app('html', srcdir=app.srcdir, freshenv=True, warning=warning,
+                         confoverrides={'inline_reference_namespaces': True})
+    build_app.build()
+    warnings = warning.getvalue()
+
+    assert 'duplicate target' not in warnings
+    assert 'Reference "a:xx" not found, referenced from ns_a:8 (1); did you mean "a:x"?' in warnings
+
+    result = (Path(build_app.outdir) / 'ns_a.html').read_text()
+    assert 'id="a:x"' in result
+    assert 'href="#a:x"' in result
+    assert 'href="ns_b.html#b:x"' in result
+    assert 'href="test.html#id10"' in result
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-previews",
+                    confoverrides={'inline_reference_previews': True})
+def test_previews_html(app, status):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    outdir = Path(app.outdir)
+    chunk = compact_id('test')
+    with open(outdir / '_static' / 'iref-previews' / f'{chunk}.json') as f:
+        previews = json.load(f)
+
+    assert previews['id5'] == 'In ut dui id3, id5 id4 nec, id6 tortor.'
+    assert 'bid4' in previews
+
+    result = (outdir / 'test_crosspage.html').read_text()
+    assert f'class="iref-preview-{chunk} reference internal" href="test.html#id1"' in result
+    assert 'inline_reference_previews.js' in result
+    assert (outdir / '_static' / 'inline_reference_previews.js').exists()
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-previews-removed",
+                    confoverrides={'inline_reference_previews': True})
+def test_previews_removed_html(app, make_app):
+    srcdir = Path(app.srcdir)
+    (srcdir / 'extra.rst').write_text(
+        ':orphan:\n\nExtra\n=====\n\nAn :iref:target:`extra<extra>`.\n'
+    )
+    app.build()
+
+    chunks = Path(app.outdir) / '_static' / 'iref-previews'
+    assert (chunks / f'{compact_id("extra")}.json').exists()
+
+    (srcdir / 'extra.rst').unlink()
+    build_app = make_app('html', srcdir=srcdir,
+                         confoverrides={'inline_reference_previews': True})
+    build_app.build()
+
+    assert 'extra' not in build_app.env.get_domain('iref').data['previews']
+    assert not (chunks / f'{compact_id("extra")}.json').exists()
+    assert (chunks / f'{compact_id("test")}.json').exists()
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-literal")
+def test_literal_html(app, warning, make_app):
+    srcdir = Path(app.srcdir)
+    (srcdir / 'listing.conf').write_text('[server]\nport = 80\nhost = *example*\n')
+    (srcdir / 'literal.rst').write_text(
+        ':orphan:\n\nLiteral\n=======\n\n'
+        '.. iref:literal::\n    :pattern: ^(\\w+) =\n    :lines: 1 section\n    :prefix: conf-\n\n'
+        '    [server]\n    port = 80\n    host = *example*\n\n'
+        '.. iref:literal::\n    :file: listing.conf\n    :pattern: ^(\\w+) =\n    :prefix: file-\n\n'
+        'Links to :iref:ref:`port<conf-port>`, :iref:ref:`section<conf-section>` and '
+        ':iref:ref:`host<file-host>`.\n'
+    )
+
+    (srcdir / 'literal_errors.rst').write_text(
+        ':orphan:\n\nErrors\n======\n\n'
+        '.. iref:literal::\n    :lines: 0 zero\n\n    line\n\n'
+        '.. iref:literal::\n    :pattern: ^(\\w+) =\n    :lines: 1 whole\n\n    port = 80\n'
+    )
+
+    build_app = make_app('html', srcdir=app.srcdir, freshenv=True, warning=warning)
+    build_app.build()
+    warnings = warning.getvalue()
+    assert 'literal.rst' not in warnings
+    assert ('Invalid entry "0 zero" in :lines:, expected the number of a line in the block '
+            '(1 to 1)') in warnings
+    assert 'Targets "port" and "whole" overlap in line 1 of the block' in warnings
+
+    result = (Path(build_app.outdir) / 'literal.html').read_text()
+    assert 'id="conf-section"' in result
+    assert 'id="conf-port"' in result
+    assert 'id="file-host"' in result
+    assert 'href="#conf-port"' in result
+    assert '*example*' in result
+
+    domain = build_app.env.get_domain('iref')
+    assert domain.data['targets']['conf-port'] == [(0, 'literal', 12, 'port')]
+    assert domain.data['targets']['file-host'] == [(0, 'literal', None, 'host')]
+    assert domain.data['documents']['literal']['targets'] == {
+        'conf-section', 'conf-port', 'conf-host', 'file-port', 'file-host'
+    }
+
+
+@pytest.mark.sphinx("html", testroot="integration", srcdir="integration-terms")
+def test_terms_html(app, warning, make_app):
+    (Path(app.srcdir) / 'terms.rst').write_text(
+        ':orphan:\n\nGlossary term\n=============\n\n'
+        'The :iref:backlink:`glossary term<gterm>` is defined here.\n\n'
+        'A glossary term, a *glossary term*, ``glossary term`` and glossary terms, and id1 but not '
+        'id10.\n'
+    )
+
+    build_app = make_app('html', srcdir=app.srcdir, freshenv=True, warning=warning,
+                         confoverrides={'inline_reference_terms': {'glossary term': 'gterm',
+                                                                   'id1': 'id1'}})
+    build_app.build()
+    assert 'terms.rst' not in warning.getvalue()
+
+    domain = build_app.env.get_domain('iref')
+    assert domain.data['loose_refs']['gterm'] == {'terms': 2}
+    assert domain.data['loose_refs']['id1']['terms'] == 1
+
+    result = (Path(build_app.outdir) / 'terms.html').read_text()
+    assert result.count('href="#gterm"') == 2
+    assert 'href=#terms-gterm-ref1' in result
+    assert result.count('href="test.html#id1"') == 1
+    assert '<em><a class="reference internal" href="#gterm"' in result
+    assert '<span class="pre">glossary</span>' in result
+    assert 'glossary terms' in result
+    assert '<h1>Glossary term' in result
+
+
+@pytest.mark.sphinx("latex", testroot="integration", srcdir="integration-backlink-limit-latex",
+                    confoverrides={'inline_reference_backlink_limit': 2})
+def test_backlink_limit_latex(app, status):
+    app.build()
+    assert "build succeeded" in status.getvalue()
+
+    result = (Path(app.srcdir) / "_build/latex/inline_reference.tex").read_text()
+    assert (r'\hyperlink{\detokenize{test-bid2-ref1}}{1},'
+            r'\hyperlink{\detokenize{iref-backrefs-bid2}}{\ldots}') in result
+
+    appendix = result[result.index(r'\appendix'):]
+    assert r'\hypertarget{\detokenize{iref-backrefs-bid2}}{References to }' in appendix
+    assert r'\hyperlink{\detokenize{bid2}}{bid2}' in appendix
+    assert all(rf'\hyperlink{{\detokenize{{test-bid2-ref{i}}}}}{{{i}}}' in appendix
+               for i in range(5))